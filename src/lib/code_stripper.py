@@ -16,7 +16,7 @@ class CodeStripper(ABC):
         self.sl_open = []
         self.ml_open = []
         self.ml_close = []
-        logging.debug(f"Initialized {self.__class__.__name__} for file {owner.file_name}")
+        logging.debug("Initialized %s for file %s", self.__class__.__name__, owner.file_name)
 
     @abstractmethod
     def detect_single(self, line: str, line_num: int, start_offset: int) -> tuple:
@@ -100,7 +100,7 @@ class CodeStripper(ABC):
                     self.strip_log.append(f"{log_indent} Multi-line unclosed content continued at line {j}, line: '{lines[j]}'")
             result_lines[line_num] = clean_line
 
-        logging.debug(f"{log_indent}Total multi-line content lines: {total_ml} / {len(result_lines)}")
+        logging.debug("%sTotal multi-line content lines: %s / %s", log_indent, total_ml, len(result_lines))
         return result_lines
 
 class CodeStringStripper(CodeStripper):
@@ -113,6 +113,9 @@ class CodeStringStripper(CodeStripper):
         self.raw_str_prefix = raw_str_prefix
         self.raw_quote_char = raw_quote_char
         self.escape_char = escape_char
+        open_chars = "".join(self.sl_open) + (raw_quote_char or "")
+        # any literal starts at a quote char, so lines without one skip the per-char scan
+        self.quote_regex = re.compile(f"[{re.escape(open_chars)}]") if open_chars else None
 
     def detect_single(self, line: str, line_num: int, start_offset: int) -> tuple:
         """Detects single-line string literals, returning positions of content between quotes."""
@@ -121,7 +124,10 @@ class CodeStringStripper(CodeStripper):
         start_pos = -1
         end_pos = -1
         _rsq_len = len(self.raw_str_prefix) if self.raw_str_prefix else 0
-        i = start_offset
+        first_quote = self.quote_regex.search(line, start_offset) if self.quote_regex else None
+        if first_quote is None:
+            return -1, -1
+        i = first_quote.start()
         while i < len(line):
             char = line[i]
             if not in_string:
@@ -153,16 +159,16 @@ class CodeStringStripper(CodeStripper):
     def detect_multi_open(self, line: str) -> tuple:
         """Detects multi-line string opening."""
         for j, open_quote in enumerate(self.ml_open):
-            match = re.search(re.escape(open_quote), line)
-            if match:
-                return match.start(), j
+            pos = line.find(open_quote)  # plain literal, no regex needed
+            if pos >= 0:
+                return pos, j
         return -1, -1
 
     def detect_multi_close(self, line: str, close_token: str, start_offset: int) -> tuple:
         """Detects multi-line string closing, starting from start_offset."""
-        match = re.search(re.escape(close_token), line[start_offset:])
-        if match:
-            return start_offset + match.start(), len(close_token)
+        pos = line.find(close_token, start_offset)
+        if pos >= 0:
+            return pos, len(close_token)
         return -1, -1
 
 class CodeCommentStripper(CodeStripper):
@@ -172,6 +178,9 @@ class CodeCommentStripper(CodeStripper):
         self.sl_open = open_sl_comment
         self.ml_open = open_ml_comment
         self.ml_close = close_ml_comment
+        # comment delimiters are regex patterns, compiled once instead of per stripped line
+        self.ml_open_regex = [re.compile(p, re.IGNORECASE) for p in open_ml_comment]
+        self.ml_close_regex = {p: re.compile(p, re.IGNORECASE) for p in close_ml_comment}
 
     def detect_single(self, line: str, line_num: int, start_offset: int) -> tuple:
         """Detects single-line comments."""
@@ -184,15 +193,15 @@ class CodeCommentStripper(CodeStripper):
 
     def detect_multi_open(self, line: str) -> tuple:
         """Detects multi-line comment opening."""
-        for j, ml_comment in enumerate(self.ml_open):
-            match = re.search(ml_comment, line, re.IGNORECASE)
+        for j, ml_regex in enumerate(self.ml_open_regex):
+            match = ml_regex.search(line)
             if match:
                 return match.start(), j
         return -1, -1
 
     def detect_multi_close(self, line: str, close_token: str, start_offset: int) -> tuple:
         """Detects multi-line comment closing, starting from start_offset."""
-        match = re.search(close_token, line[start_offset:], re.IGNORECASE)
+        match = self.ml_close_regex[close_token].search(line, start_offset)
         if match:
-            return start_offset + match.start(), len(close_token)
+            return match.start(), len(close_token)
         return -1, -1
\ No newline at end of file
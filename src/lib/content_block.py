@@ -3,6 +3,7 @@
 # Proposed: 2025-08-06
 # Changes: Added module_map parameter to compress for imported class name compression (e.g., SandwichPack), added log separator (CLA Rule 2: Ensure code correctness, CLA Rule 12: Minimize changes).
 
+import bisect
 import logging
 import re
 import os
@@ -10,7 +11,8 @@ import math
 from datetime import datetime
 from pathlib import Path
 from .deps_builder import DepsParser
-from .llm_tools import estimate_tokens
+from .llm_tools import estimate_tokens, line_token_stats, tiktoken_encoding
+from .lines_view import LinesView
 from .code_stripper import CodeStringStripper, CodeCommentStripper
 
 # PROTECTION CODE DON'T TOUCH, typing is disabled!!!
@@ -23,9 +25,12 @@ logging.basicConfig(
 
 class ContentBlock:
     supported_types = [':document', ':post']
+    strips_in_parse = False  # True when parse_content() rebuilds and strips clean_lines by itself
+    wrapper_lines = 2  # opening and closing tag lines to_sandwich_block() puts around content_text
 
     def __init__(self, content_text, content_type, file_name=None, timestamp=None, **kwargs):
         self.content_text = content_text
+        self.line_count = content_text.count("\n") + 1
         self.content_type = content_type
         self.tag = "post" if content_type == ":post" else "document"
         self.parsers = []
@@ -55,7 +60,12 @@ class ContentBlock:
         self.escape_char = "\\"
         self.module_prefix = ""
         self.line_offsets = []
-        logging.debug(f"Initialized base of {type(self).__name__} with content_type={content_type}, tag={self.tag}, file_name={file_name}")
+        self.clean_content_cache = None  # (clean_lines snapshot, line_offsets, joined content) of last get_clean_content()
+        self.tokens_index = None  # (clean_lines, char/token/tail prefix sums, leads) for estimate_lines_tokens
+        self.line_stats = {}
+        self.bounds_cache = {}  # start_line -> (start_line, end_line) for bounds_cache_lines
+        self.bounds_cache_lines = None
+        logging.debug("Initialized base of %s with content_type=%s, tag=%s, file_name=%s", type(self).__name__, content_type, self.tag, file_name)
 
     def parse_warn(self, msg):
         """Logs a warning and adds it to self.warnings."""
@@ -83,7 +93,7 @@ class ContentBlock:
         self.clean_lines = stripper.strip(self.clean_lines)
         self.strip_log.extend(stripper.strip_log)
         self.warnings.extend(stripper.warnings)
-        self.get_clean_content()
+        self.update_line_offsets()
         return self.clean_lines
 
     def strip_comments(self):
@@ -99,7 +109,7 @@ class ContentBlock:
         self.clean_lines = stripper.strip(self.clean_lines)
         self.strip_log.extend(stripper.strip_log)
         self.warnings.extend(stripper.warnings)
-        self.get_clean_content()
+        self.update_line_offsets()
         return self.clean_lines
 
     def save_clean(self, file_name):
@@ -112,7 +122,7 @@ class ContentBlock:
             with output_path.open("w", encoding="utf-8") as f:
                 for line_num, line in enumerate(self.clean_lines[1:], 1):
                     f.write((line if line.strip() else f"// Line {line_num}") + "\n")
-            logging.debug(f"Saved cleaned content to {file_name}")
+            logging.debug("Saved cleaned content to %s", file_name)
         except Exception as e:
             logging.error(f"Failed to save cleaned content to {file_name}: {str(e)}")
 
@@ -120,23 +130,59 @@ class ContentBlock:
         """Returns the cleaned content as a single string and updates line_offsets."""
         if len(self.clean_lines) <= 1:
             raise Exception("clean_lines not initialized")
+        cached = self.clean_content_cache
+        # parsers of one parse_content() pass start from copies of the same lines; comparing the lists is
+        # mostly pointer checks, cheaper than joining the text and rebuilding offsets again
+        if cached is not None and cached[0] == self.clean_lines:
+            self.line_offsets = cached[1]
+            return cached[2]
+        self.update_line_offsets()
         content = "\n".join(self.clean_lines[1:])
+        self.clean_content_cache = (self.clean_lines.copy(), self.line_offsets, content)
+        return content
+
+    def update_line_offsets(self):
+        """Rebuilds line_offsets from clean_lines without materializing the joined content."""
         self.line_offsets = [0]
         offset = 0
         for line in self.clean_lines[1:]:
             offset += len(line) + 1
             self.line_offsets.append(offset)
         # logging.debug(f"Updated line_offsets: {self.line_offsets[:10]}... (total {len(self.line_offsets)})")
-        return content
 
     def find_line(self, content_offset):
         """Finds the line number for a given content offset."""
         if not self.line_offsets:
-            self.get_clean_content()
-        for i, offset in enumerate(self.line_offsets):
-            if content_offset < offset:
-                return i
-        return len(self.line_offsets) - 1
+            self.update_line_offsets()
+        # first line whose end offset exceeds content_offset, clamped to the last line
+        return min(bisect.bisect_right(self.line_offsets, content_offset), len(self.line_offsets) - 1)
+
+    def estimate_lines_tokens(self, first_line, last_line, text):
+        """Estimates tokens of entity text, via per-line prefix sums when text is joined clean_lines[first_line:last_line + 1]."""
+        lines = self.clean_lines
+        if isinstance(text, LinesView) and (text.lines is not lines or (text.first, text.last) != (first_line, last_line)):
+            text = str(text)
+        if not (1 <= first_line <= last_line < len(lines)) or tiktoken_encoding() is not None:
+            return estimate_tokens(str(text))  # BPE counts don't add up per line
+        if self.tokens_index is None or self.tokens_index[0] is not lines:  # reset by lines_changed() after masquerade
+            chars, tokens, tails, leads = [0], [0], [0], []
+            for line in lines:
+                stats = self.line_stats.get(line)
+                if stats is None:
+                    stats = self.line_stats[line] = line_token_stats(line)
+                chars.append(chars[-1] + len(line) + 1)
+                tokens.append(tokens[-1] + stats[0])
+                tails.append(tails[-1] + stats[2])
+                leads.append(stats[1])
+            self.tokens_index = (lines, chars, tokens, tails, leads)
+        _, chars, tokens, tails, leads = self.tokens_index
+        exact = isinstance(text, LinesView) or (
+            len(text) == chars[last_line + 1] - chars[first_line] - 1 and
+            text.startswith(lines[first_line]) and text.endswith(lines[last_line]))
+        if not exact:
+            return estimate_tokens(text)
+        lead = leads[first_line] or (not lines[first_line] and last_line > first_line)
+        return tokens[last_line + 1] - tokens[first_line] + tails[last_line] - tails[first_line] + int(lead)
 
     def count_chars(self, line_num, ch):
         """Counts occurrences of a character in a specific line of clean code."""
@@ -160,8 +206,23 @@ class ContentBlock:
         self.entity_map = sorted_map
         return result
 
+    def lines_changed(self):
+        """Drops caches derived from clean_lines texts, after lines were patched in place (masquerade)."""
+        self.tokens_index = None
+        self.bounds_cache_lines = None
+
     def detect_bounds(self, start_line, clean_lines):
-        """Detects the start and end line of an entity using brace counting."""
+        """Detects the start and end line of an entity using brace counting, memoized per clean_lines list."""
+        if self.bounds_cache_lines is not clean_lines:
+            self.bounds_cache_lines = clean_lines
+            self.bounds_cache = {}
+        bounds = self.bounds_cache.get(start_line)
+        if bounds is None:
+            bounds = self.bounds_cache[start_line] = self.scan_bounds(start_line, clean_lines)
+        return bounds
+
+    def scan_bounds(self, start_line, clean_lines):
+        """Brace counting scan behind detect_bounds."""
         if start_line < 1 or start_line >= len(clean_lines) or not clean_lines[start_line] or not clean_lines[start_line].strip():
             logging.error(f"Invalid start line {start_line} for file {self.file_name} module [{self.module_prefix}]")
             return start_line, start_line
@@ -202,15 +263,15 @@ class ContentBlock:
         line = self.clean_lines[line_num]
         base_name = name.split(".")[-1]
         base_name = base_name.split("::")[-1].split("<")[0]
-        pattern = rf"\b{base_name}\b"
-        result = bool(re.search(pattern, line))
+        pattern = re.compile(rf"\b{base_name}\b")  # reused for the whole-file rescan below
+        result = bool(pattern.search(line))
         if not result:
             best = 10
             for i, search_line in enumerate(self.clean_lines[1:], 1):
-                if isinstance(search_line, str) and re.search(pattern, search_line):
+                if isinstance(search_line, str) and pattern.search(search_line):
                     diff = line_num - i
                     best = min(best, abs(diff))
-                    logging.debug(f"  occurrence of '{base_name}' found at line {i}: '{search_line}'")
+                    logging.debug("  occurrence of '%s' found at line %s: '%s'", base_name, i, search_line)
             result = abs(best) <= 1
 
         # logging.debug(f"Checking entity placement for {name} at line {line_num}: {'Passed' if result else 'Failed'}, line: '{line}'")
@@ -230,18 +291,26 @@ class ContentBlock:
         if entity["type"] != "abstract method" or "last_line" not in entity:
             entity["last_line"] = self.detect_bounds(line_num, self.clean_lines)[1]
         self.entity_map[line_num] = entity
-        logging.debug(f"Added entity {entity['name']} at first_line={line_num}, last_line={entity['last_line']}")
+        logging.debug("Added entity %s at first_line=%s, last_line=%s", entity['name'], line_num, entity['last_line'])
         return True
 
-    def extract_entity_text(self, def_start: int, def_end: int) -> str:
-        """Extracts the full entity text using clean_lines for brace counting."""
-        content = self.get_clean_content()
+    def extract_entity_text(self, def_start: int, def_end: int, lazy: bool = False) -> str:
+        """Extracts the full entity text using clean_lines for brace counting.
+
+        With lazy=True a multi-line entity is returned as LinesView, for callers that only pass text to make_add_entity.
+        """
+        if not self.line_offsets:
+            self.update_line_offsets()
         start_line = self.find_line(def_end)  # открывающая реальная скобка должна находиться тут
         start_line, end_line = self.detect_bounds(start_line, self.clean_lines)
         if start_line == end_line:
             self.parse_warn(f"Incomplete/abstract entity in file {self.file_name} at start={def_start}, line @{start_line} using header end")
-            return content[def_start:].splitlines()[0]
+            # header tail is taken from the owning line via offsets, without joining/slicing whole content
+            head_line = self.find_line(def_start)
+            return self.clean_lines[head_line][def_start - self.line_offsets[head_line - 1]:]
         logging.info(f"Extracted entity from first_line={start_line} to last_line={end_line}")
+        if lazy:
+            return LinesView(self.clean_lines, start_line, end_line)
         return "\n".join(self.clean_lines[start_line:end_line + 1])
 
     def extend_deps(self, parser):
@@ -252,9 +321,8 @@ class ContentBlock:
             deps = parser.dependencies
         i = getattr(deps, 'imports', {})
         m = getattr(deps, 'modules', [])
-        unique = set(self.dependencies['modules'])
-        unique.update(m)
-        self.dependencies['modules'] = list(unique)
+        # dict keys dedupe in one pass and keep first-seen order, so module order no longer depends on str hashing
+        self.dependencies['modules'] = list(dict.fromkeys([*self.dependencies['modules'], *m]))
         self.dependencies['imports'].update(i)
 
     def full_text_replace(self, from_str: str, entity_id: int, ent_type: str, is_definition: bool = False):
@@ -286,7 +354,7 @@ class ContentBlock:
         if compressed == self.content_text:
             logging.warning(f"Failed replace '{from_str}' with '\x0F{entity_id}' in {self.file_name} (type={ent_type}, is_definition={is_definition})")
         else:
-            logging.debug(f"Replaced '{from_str}' with '\x0F{entity_id}' in {self.file_name} (type={ent_type}, is_definition={is_definition})")
+            logging.debug("Replaced '%s' with '\x0F%s' in %s (type=%s, is_definition=%s)", from_str, entity_id, self.file_name, ent_type, is_definition)
             self.content_text = compressed
         return self.content_text
 
@@ -298,7 +366,7 @@ class ContentBlock:
             file_map: Dictionary file names to file_id.
         """
         if self.content_type == ":post":
-            logging.debug(f"No compression for post content: {self.file_name}")
+            logging.debug("No compression for post content: %s", self.file_name)
             return
         file_index = {}
         for file_name, file_id in file_map.items():
@@ -307,7 +375,7 @@ class ContentBlock:
         for (file_id, ent_type, ent_name) in entity_rev_map:
             ent_index[ent_name] = (file_id, ent_type, ent_name)
 
-        logging.debug(f"------- compressing {self.file_name} -------")
+        logging.debug("------- compressing %s -------", self.file_name)
         original_length = len(self.content_text)
         valid_entities = {}
         name_count = {}
@@ -319,7 +387,7 @@ class ContentBlock:
             ent_type = entity["type"]
             ent_name = entity["name"]
             if name_count[ent_name] > 1:
-                logging.debug(f"SKIP_ENTITY: non unique name {ent_name}")
+                logging.debug("SKIP_ENTITY: non unique name %s", ent_name)
                 continue
             if ent_type in (
                 "function",
@@ -336,14 +404,14 @@ class ContentBlock:
                 "object",
             ):
                 valid_entities[ent_name] = (self.file_id, ent_type, line_num)
-                logging.debug(f"Added local entity {ent_name} ({ent_type}, file_id={self.file_id}, line={line_num}) for compression")
+                logging.debug("Added local entity %s (%s, file_id=%s, line=%s) for compression", ent_name, ent_type, self.file_id, line_num)
             if "parent" in entity and entity["parent"]:
                 parent_name = entity["parent"]
                 for ent_type in ("class", "interface"):
                     key = (self.file_id, ent_type, parent_name)
                     if key in entity_rev_map:
                         valid_entities[parent_name] = (self.file_id, ent_type, None)
-                        logging.debug(f"Added parent entity {parent_name} ({ent_type}, file_id={self.file_id}) for compression")
+                        logging.debug("Added parent entity %s (%s, file_id=%s) for compression", parent_name, ent_type, self.file_id)
 
         for parser in getattr(self, "parsers", []):
             if isinstance(parser, DepsParser):
@@ -357,12 +425,13 @@ class ContentBlock:
                             # TODO: можно добавить проверку для коротких имен, на соответствие mod_name и file_name
                             mod_name = parser.imports[ent_name]
                             valid_entities[ent_name] = (file_id, ent_type, None)
-                            logging.debug(f"Added imported entity {ent_name} ({ent_type}, mod={mod_name}, file_id={file_id}), file_name=`{file_name}` for compression")
+                            logging.debug("Added imported entity %s (%s, mod=%s, file_id=%s), file_name=`%s` for compression", ent_name, ent_type, mod_name, file_id, file_name)
                     else:
                         logging.warning(f"Failed locate imported entity {ent_name}")
-                logging.debug(f"Checked {checked} from imports: {parser.imports}")
+                logging.debug("Checked %s from imports: %s", checked, parser.imports)
 
         compressed_count = 0
+        rev_file_ids = None  # file ids present in entity_rev_map, collected once on first need
         for ent_name, (file_id, ent_type, line_num) in valid_entities.items():
             key = (file_id, ent_type, ent_name)
             is_definition = False
@@ -375,7 +444,9 @@ class ContentBlock:
                 ):
                     is_definition = True
             if file_id is None:
-                for fid in {f[0] for f in entity_rev_map.keys()}:
+                if rev_file_ids is None:
+                    rev_file_ids = {f[0] for f in entity_rev_map.keys()}
+                for fid in rev_file_ids:
                     test_key = (fid, ent_type, ent_name)
                     if test_key in entity_rev_map:
                         index = entity_rev_map[test_key]
@@ -487,6 +558,9 @@ class SpanBlock(ContentBlock):
         self.meta = meta
         self.file_id = file_id
         self.block_hash = block_hash
+        if meta.get('start', -1) < 0 or meta.get('end', -1) < 0:
+            self.line_count = 0  # to_sandwich_block() emits a one-line error element instead of the span
+            self.wrapper_lines = 1
 
     def to_sandwich_block(self):
         meta = self.meta
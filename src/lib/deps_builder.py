@@ -19,13 +19,13 @@ class DepsParser(EntityParser):
         """Add a module to the dependencies list."""
         if name and name not in self.modules:
             self.modules.append(name)
-            logging.debug(f"Added module import: {name} for file {self.owner.file_name}")
+            logging.debug("Added module import: %s for file %s", name, self.owner.file_name)
 
     def add_import(self, mod_name, ent_name):
         """Add an import of an entity from a module."""
         if mod_name and ent_name:
             self.imports[ent_name] = mod_name
-            logging.debug(f"Added entity import: {ent_name} from {mod_name} for file {self.owner.file_name}")
+            logging.debug("Added entity import: %s from %s for file %s", ent_name, mod_name, self.owner.file_name)
 
     def store_deps(self, dest: dict) -> dict:
         dest['imports'].extend(self.imports)
@@ -96,5 +96,5 @@ def organize_modules(file_list, blocks):
             if 'file_id' in entity:
                 entity['file_id'] = new_file_ids.get(str(entity['file_id']), entity['file_id'])
 
-    logging.debug(f"Sorted file_list: {sorted_file_list}")
+    logging.debug("Sorted file_list: %s", sorted_file_list)
     return sorted_file_list, sorted_blocks
\ No newline at end of file
@@ -20,7 +20,7 @@ class DocumentBlock(ContentBlock):
             '.toml': 'toml',
             '.rulz': 'rules'
         }.get(content_type, 'document')
-        logging.debug(f"Initialized DocumentBlock with tag={self.tag}, content_type={content_type}, file_name={file_name}")
+        logging.debug("Initialized DocumentBlock with tag=%s, content_type=%s, file_name=%s", self.tag, content_type, file_name)
 
 
 SandwichPack.register_block_class(DocumentBlock)
@@ -39,7 +39,7 @@ class TextDataBlock(ContentBlock):
             '.yaml': 'yaml',
             '.txt': 'text_plain',
         }.get(content_type, 'text_data')
-        logging.debug(f"Initialized TextDataBlock with tag={self.tag}, content_type={content_type}, file_name={file_name}")
+        logging.debug("Initialized TextDataBlock with tag=%s, content_type=%s, file_name=%s", self.tag, content_type, file_name)
 
 
 SandwichPack.register_block_class(TextDataBlock)
@@ -1,11 +1,14 @@
 # /lib/entity_parser.py, updated 2025-08-08 12:01 EEST
 # Formatted with proper line breaks and indentation for project compliance.
 
+import bisect
 import logging
 import re
 import traceback
-from .llm_tools import estimate_tokens
 from .iter_regex import IterativeRegex
+from .lines_view import LinesView
+
+_NL_REGEX = re.compile("\n")  # newline finder for parse_inner line index
 
 
 def match_value(match, field: str, default=None):
@@ -21,7 +24,7 @@ def get_start_pos(match, field: str = "name"):
 class EntityParser:
     """Base class for parsing entities in content blocks."""
 
-    def __init__(self, entity_type, owner, outer_regex: IterativeRegex, mask_pattern, inner_regex: IterativeRegex = None, default_visibility="public"):
+    def __init__(self, entity_type, owner, outer_regex: IterativeRegex, mask_pattern, inner_regex: IterativeRegex = None, default_visibility="public", fast_screen: str = None):
         """Initialize parser with entity type, owner block, and iterative regex objects.
 
         Args:
@@ -31,19 +34,22 @@ class EntityParser:
             mask_pattern (str): Regex pattern for masking entity tokens.
             inner_regex (IterativeRegex, optional): Iterative regex for inner entities.
             default_visibility (str): Default visibility if 'vis' group is absent ('public' or 'private').
+            fast_screen (str, optional): Literal required for any match; parse() skips the regex sweep without it.
         """
         self.entity_type = entity_type
         self.owner = owner
-        self.content = owner.get_clean_content()
+        self.content = ""  # joined clean content, taken by parse() after previous parsers masquerade
         self.outer_regex = outer_regex
         self.mask_pattern = mask_pattern
+        self.mask_regex = re.compile(mask_pattern)  # applied per entity line in masquerade()
         self.inner_regex = inner_regex
         self.default_visibility = default_visibility
+        self.fast_screen = fast_screen
         self.new_entities_lines = []  # List of first_line numbers for new entities
         self.modules = []
         self.imports = {}  # Dict[entity_name: module_name]
 
-        logging.debug(f"Initialized EntityParser for entity_type={entity_type}, file={owner.file_name}, default_visibility={default_visibility}")
+        logging.debug("Initialized EntityParser for entity_type=%s, file=%s, default_visibility=%s", entity_type, owner.file_name, default_visibility)
 
     def _format_entity_name(self, match):
         name = match.group('name')
@@ -71,6 +77,12 @@ class EntityParser:
         Returns:
             dict: Entity dictionary with computed fields.
         """
+        entity, bounds = self._entity_draft(e_type, name, vis, first_line, extra_fields)
+        entity["tokens"] = self.owner.estimate_lines_tokens(*bounds, full_text)
+        return entity
+
+    def _entity_draft(self, e_type: str, name: str, vis: str, first_line: int, extra_fields: dict = None):
+        """Entity dict without token count and its (first, last) bounds; tokens are filled once the entity is accepted."""
         start_line = first_line
         last_line = start_line
         if not ("abstract" in e_type):
@@ -83,11 +95,11 @@ class EntityParser:
             "file_id": self.owner.file_id,
             "first_line": start_line,
             "last_line": last_line,
-            "tokens": estimate_tokens(full_text)
+            "tokens": None
         }
         if extra_fields:
             entity.update(extra_fields)
-        return entity
+        return entity, (start_line, last_line)
 
     def make_add_entity(self, e_type: str, name: str, vis: str, first_line: int, full_text: str, extra_fields: dict = None) -> bool:
         """Create and add an entity to entity_map.
@@ -107,8 +119,9 @@ class EntityParser:
         if prev:
             logging.warning(f"Failed to add entity {name} at line {first_line}: already exists {prev} ")
             return False
-        entity = self.make_entity(e_type, name, vis, first_line, full_text, extra_fields)
+        entity, bounds = self._entity_draft(e_type, name, vis, first_line, extra_fields)
         if self.owner.add_entity(first_line, entity):
+            entity["tokens"] = self.owner.estimate_lines_tokens(*bounds, full_text)
             self.new_entities_lines.append(first_line)
             return True
         logging.error(" add_entity failed")
@@ -141,23 +154,23 @@ class EntityParser:
         start_pos = get_start_pos(base_match)  # name start for start_line (formal entity location)
         start_line = self.owner.find_line(start_pos)
         if start_line in self.owner.entity_map:
-            logging.debug(f" Skipping line {start_line} for {self.entity_type} as it is already processed: {self.owner.entity_map[start_line]}")
+            logging.debug(" Skipping line %s for %s as it is already processed: %s", start_line, self.entity_type, self.owner.entity_map[start_line])
             return
 
         clean_content = self.content
         validation = self.outer_regex.validate_match(clean_content, def_start)
         hit_rate = validation['hit_rate']
         if hit_rate < 0.5:
-            logging.debug(f" Skipping low hit_rate {hit_rate} for match at {start_line}, offset{def_start}")
+            logging.debug(" Skipping low hit_rate %s for match at %s, offset%s", hit_rate, start_line, def_start)
             return
 
         match = validation['match']
         def_end = match.end()
-        full_text = self.owner.extract_entity_text(def_start, def_end)
-        ent_lines = len(full_text.splitlines())
+        full_text = self.owner.extract_entity_text(def_start, def_end, lazy=not self.inner_regex)
+        ent_lines = full_text.line_count() if isinstance(full_text, LinesView) else full_text.count('\n') + 1
         vis = self.detect_visibility(match)
         name_final = self._format_entity_name(match)
-        logging.debug(f"Processing entity {name_final} at line {start_line}, text lines {ent_lines}")
+        logging.debug("Processing entity %s at line %s, text lines %s", name_final, start_line, ent_lines)
         spec = ''
         extra_fields = {"hit_rate": hit_rate}
         if match_value(match, "async"):
@@ -184,8 +197,11 @@ class EntityParser:
         if not self.content.strip():
             logging.debug("Attempt parsing void content")
             return False
+        if self.fast_screen and self.fast_screen not in self.content:
+            logging.debug("No `%s` in content, skipping %s parsing", self.fast_screen, self.entity_type)
+            return False
 
-        logging.debug(f"====================== Start parsing {self.entity_type} ======================= ")
+        logging.debug("====================== Start parsing %s ======================= ", self.entity_type)
         for base_match in self.outer_regex.all_matches(self.content):
             self._process_match(base_match)
         return True
@@ -204,24 +220,25 @@ class EntityParser:
         if not self.inner_regex:
             return
         found = 0
+        nl_offsets = [m.start() for m in _NL_REGEX.finditer(content)]  # newline index, built once per parent
         for base_match in self.inner_regex.all_matches(content):
             start_pos = base_match.start()  # initial start
-            line_count = content[:start_pos].count('\n')
+            line_count = bisect.bisect_left(nl_offsets, start_pos)
             method_line = offset + line_count
 
             validation = self.inner_regex.validate_match(content, start_pos)
             hit_rate = validation['hit_rate']
             if hit_rate < 0.4:
-                logging.debug(f"Skipping low hit_rate {hit_rate} for inner match at {method_line}")
+                logging.debug("Skipping low hit_rate %s for inner match at %s", hit_rate, method_line)
                 continue
             match = validation['match']
             full_text_method = match.group(0).strip()
-            head_len = len(full_text_method.splitlines())
+            head_len = full_text_method.count('\n') + 1
             vis = self.detect_visibility(match)
             ent_type = "method"
             if self.detect_abstract(match):
                 ent_type = "abstract " + ent_type
-                logging.debug(f" detected abstract method {full_text_method}, {head_len} lines")
+                logging.debug(" detected abstract method %s, %s lines", full_text_method, head_len)
 
             if match_value(match, 'async'):
                 ent_type = "async " + ent_type
@@ -230,17 +247,18 @@ class EntityParser:
             spec = spec + ' ' if spec else ''
             extra_fields = {"parent": parent_name, "hit_rate": hit_rate}
 
-            entity = self.make_entity(spec + ent_type, name, vis, method_line, full_text_method, extra_fields=extra_fields)
+            entity, bounds = self._entity_draft(spec + ent_type, name, vis, method_line, extra_fields=extra_fields)
             entity["last_line"] = max(entity["last_line"], method_line + head_len - 1)  # multi-line declaration of abstract method
             if self.owner.add_entity(method_line, entity):
+                entity["tokens"] = self.owner.estimate_lines_tokens(*bounds, full_text_method)
                 self.new_entities_lines.append(method_line)
                 found += 1
             else:
                 logging.warning(f"Failed to add inner entity {name} for {parent_name}")
         if found > 0:
-            logging.debug(f" found inner {found} entities with parent {parent_name}")
+            logging.debug(" found inner %s entities with parent %s", found, parent_name)
         elif len(content) > 100:
-            logging.debug(f" not found inner entities in:\n {content}")
+            logging.debug(" not found inner entities in:\n %s", content)
 
     def masquerade(self):
         """Masquerade parsed entities in clean_lines.
@@ -248,11 +266,12 @@ class EntityParser:
         Replaces self.mask_pattern with entity['type'] for entity lines.
 
         Returns:
-            list: Modified clean_lines.
+            list: Modified clean_lines (owner's list, patched in place instead of copying whole file per parser).
         """
-        clean_lines = self.owner.clean_lines.copy()
+        clean_lines = self.owner.clean_lines
         if getattr(self, 'new_entities_lines', False):
             for line_num in self.new_entities_lines:
                 e = self.owner.entity_map[line_num]
-                clean_lines[line_num] = re.sub(self.mask_pattern, e['type'], clean_lines[line_num])
+                clean_lines[line_num] = self.mask_regex.sub(e['type'], clean_lines[line_num])
+            self.owner.lines_changed()  # line texts changed under the same list
         return clean_lines
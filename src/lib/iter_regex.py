@@ -3,6 +3,13 @@
 
 import re
 import logging
+from functools import lru_cache
+
+
+@lru_cache(maxsize=256)
+def compile_regex(pattern: str, flags: int = 0):
+    """Compiles a regex once per process; parsers are rebuilt for every file with identical tokens."""
+    return re.compile(pattern, flags)
 
 
 class IterativeRegex:
@@ -11,6 +18,7 @@ class IterativeRegex:
     def __init__(self):
         """Initialize with empty token list."""
         self.tokens = []  # List of (regex_part: str, fields: list, detect_points: int)
+        self.patterns = []  # Compiled cumulative regexes: patterns[i] covers tokens[0..i]
         self.max_points = 0
 
     def add_token(self, regex_part: str, fields: list, detect_points: int):
@@ -22,7 +30,9 @@ class IterativeRegex:
             detect_points (int): Weight for hit_rate calculation.
         """
         try:
-            re.compile(regex_part)  # Validate regex
+            compile_regex(regex_part)  # Validate regex
+            full_regex = (self.patterns[-1].pattern if self.patterns else "") + regex_part
+            self.patterns.append(compile_regex(full_regex, re.MULTILINE))
             self.tokens.append((regex_part, fields, detect_points))
             self.max_points += detect_points
         except re.error as e:
@@ -44,16 +54,31 @@ class IterativeRegex:
             return []
         base_regex = self.tokens[0][0]  # First token is base
         try:
-            matches = list(re.finditer(base_regex, content_text, re.MULTILINE))
+            matches = list(self.patterns[0].finditer(content_text))
             if matches:
-                logging.debug(f"Found {len(matches)} base matches for {base_regex}")
-            else:
-                logging.debug(f"No base matches for {base_regex} in {content_text.strip()}")
+                logging.debug("Found %s base matches for %s", len(matches), base_regex)
+            elif logging.root.isEnabledFor(logging.DEBUG):  # strip() copies the whole content
+                logging.debug("No base matches for %s in %s", base_regex, content_text.strip())
             return matches
         except re.error as e:
             logging.error(f"Failed to match base regex {base_regex}: {str(e)}")
             return []
 
+    def iter_matches(self, content_text: str):
+        """Lazily yield base matches with their validation, for callers that may stop at the first usable one.
+
+        Args:
+            content_text (str): Text to parse.
+
+        Yields:
+            tuple: (base match object, validate_match() result for its start offset).
+        """
+        if not self.tokens:
+            logging.error("No tokens defined for matching")
+            return
+        for base_match in self.patterns[0].finditer(content_text):
+            yield base_match, self.validate_match(content_text, base_match.start())
+
     def validate_match(self, content_text: str, start_offset: int):
         """Validate a match by applying a full regex from tokens up to the current iteration.
 
@@ -68,42 +93,42 @@ class IterativeRegex:
             logging.error("No tokens defined for validation")
             return {'match': None, 'hit_rate': 0.0, 'end_offset': start_offset}
         assert start_offset >= 0, f"invalid start offset {start_offset}"
+        # fused fast path: the last pattern holds all tokens, a full hit needs one anchored match in the C engine
+        full = self.patterns[-1].match(content_text, start_offset)
+        if full:
+            return {
+                'match': full,
+                'hit_rate': 1.0 if self.max_points > 0 else 0.0,
+                'end_offset': full.end()
+            }
         total_points = 0
         last_match = None
         end_offset = start_offset
         current_points = 0
-        full_regex = ""
         best_regex = ""
-        line = content_text[start_offset:].splitlines()[0]
-        for i, token in enumerate(self.tokens, 1):
-            # Build full regex up to current token
-            full_regex += token[0]
+        for i, (token, pattern) in enumerate(zip(self.tokens, self.patterns), 1):
+            # Full regex up to current token, compiled once in add_token
+            full_regex = pattern.pattern
             current_points += token[2]
             try:
-                found = None
-                present = []
-                matches = list(re.finditer(full_regex, content_text, re.MULTILINE))
-                for match in matches:
-                    loc = match.start()
-                    if loc == start_offset:
-                        found = match
-                        break
-                    else:
-                        present.append(loc)
+                found = pattern.match(content_text, start_offset)  # anchored, no scan of the preceding text
                 if found:
                     last_match = found
                     total_points = current_points
                     end_offset = found.end()
                     best_regex = full_regex
                 else:
-                    logging.debug(f"\t#{i} Failed full regex {full_regex} at offset {start_offset}, line: {line}. Present only at {present}")
+                    if logging.root.isEnabledFor(logging.DEBUG):
+                        eol = content_text.find('\n', start_offset)
+                        line = content_text[start_offset:eol if eol >= 0 else None]
+                        logging.debug("\t#%s Failed full regex %s at offset %s, line: %s", i, full_regex, start_offset, line)
                     break
             except re.error as e:
                 logging.error(f"Error matching full regex {full_regex}: {str(e)}")
                 break
 
         if best_regex:
-            logging.debug(f" \t Matched best regex {best_regex}, points: {total_points}, end_offset: {end_offset}")
+            logging.debug(" \t Matched best regex %s, points: %s, end_offset: %s", best_regex, total_points, end_offset)
 
         hit_rate = total_points / self.max_points if self.max_points > 0 else 0.0
         return {
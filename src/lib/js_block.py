@@ -26,14 +26,49 @@ OBJECT_REGEX_PATTERN = r"const\s+(?P<name>\w+)\s*="
 METHODS_REGEX_PATTERN = r"(?:methods|computed|watch)\s*:"
 # Negative lookahead to avoid matching JS/TS keywords as method names
 TS_KEYWORD_EXCLUSION = r'(?!(?:if|for|while|switch|return|throw|catch|else|try|do|typeof|instanceof|void|await|delete|of|in)\b)'
+# parser regexes are built once per module and shared by all parser instances (JS, TS and Vue blocks)
+_OBJECT_REGEX = IterativeRegex()\
+    .add_token(BASE_REGEX_PATTERN + OBJECT_REGEX_PATTERN, ["indent", "name"], 2)\
+    .add_token(r"\s*{", ["head_end"], 1)
+_METHODS_OUTER = IterativeRegex()\
+    .add_token(r"^(?P<indent>[ \t]*)(?P<spec>" + METHODS_REGEX_PATTERN + r")", ["indent", "spec", "name", "args"], 2)\
+    .add_token(r"\s*{", ["head_end"], 1)
+_METHODS_INNER = IterativeRegex()\
+    .add_token(r"^\s*(?P<name>\w+)\s*\((?P<args>[^)]*)\)", ["name", "args"], 2)\
+    .add_token(r"\s*{", ['head_end'], 1)
+_FUNCTION_REGEX = IterativeRegex()\
+    .add_token(BASE_REGEX_PATTERN + FN_REGEX_PATTERN, ["indent", "async", "name", "name2"], 2)\
+    .add_token(r"(?P<args>[^\)]*)\)(?:\s*=>)?\s*{", ["args"], 1)\
+    .add_token(r"\s*{", ["head_end"], 1)
+_INTERFACE_REGEX = IterativeRegex()\
+    .add_token(BASE_REGEX_PATTERN + INTERFACE_REGEX_PATTERN, ["indent", "vis", "name"], 2)\
+    .add_token(r"\s+extends\s+(?P<parent>\w+)", ["parent"], 1)\
+    .add_token(r"\s*{", ["head_end"], 1)
+_CLASS_OUTER = IterativeRegex()\
+    .add_token(BASE_REGEX_PATTERN + CLASS_REGEX_PATTERN, ["indent", "vis", "name"], 2)\
+    .add_token(r"\s+extends\s+(?P<parent>\w+)", ["parent"], 1)\
+    .add_token(r"\s*{", ["head_end"], 1)
+_CLASS_INNER = IterativeRegex()\
+    .add_token(
+        r'^(?P<indent>[ \t]+)'
+        r'(?:(?P<vis>public|private|protected)\s+)?'
+        r'(?:static\s+)?'
+        r'(?P<async>async\s+)?'
+        + TS_KEYWORD_EXCLUSION +
+        r'(?P<name>[a-zA-Z_$][a-zA-Z0-9_$]*)\s*\(',
+        ["indent", "vis", "async", "name"], 2
+    )\
+    .add_token(r'(?P<args>[^)]*)\)', ["args"], 1)\
+    .add_token(r'(?:\s*:\s*[^{;\n]+?)?', ["return"], 1)\
+    .add_token(r'\s*\{', ["head_end"], 1)
+_IMPORT_REGEX = IterativeRegex()\
+    .add_token(r"^(?P<indent>[ \t]*)import\s+{?(?P<items>[\w,\s]+)}?\s+from\s+['\"](?P<module>[^'\"]+)['\"]", ["indent", "items", "module"], 2)
+_IMPORT_ITEM_REGEX = re.compile(r"(\w+)\s*(?:,|$)", re.MULTILINE)  # names in an import list, `a as b` yields b
 
 class ObjectParser(EntityParser):
     """Parser for JavaScript object declarations."""
     def __init__(self, entity_type, owner):
-        outer_regex = IterativeRegex()
-        outer_regex.add_token(BASE_REGEX_PATTERN + OBJECT_REGEX_PATTERN, ["indent", "name"], 2)
-        outer_regex.add_token(r"\s*{", ["head_end"], 1)
-        super().__init__(entity_type, owner, outer_regex, r"\bconst\b|\bexport\b", default_visibility="public")
+        super().__init__(entity_type, owner, _OBJECT_REGEX, r"\bconst\b|\bexport\b", default_visibility="public")
 
     def _format_entity_name(self, match):
         name = match.group('name') or "default"
@@ -46,14 +81,14 @@ class ObjectParser(EntityParser):
             start_line = self.owner.find_line(start_pos)
             validation = self.outer_regex.validate_match(content, start_pos)
             if validation['hit_rate'] < 0.5:
-                logging.debug(f"Skipping low hit_rate {validation['hit_rate']} for match at {start_line}")
+                logging.debug("Skipping low hit_rate %s for match at %s", validation['hit_rate'], start_line)
                 continue
             match = validation['match']
             if not match:
                 continue
             name = self._format_entity_name(match)
             vis = self.default_visibility
-            full_text = self.owner.extract_entity_text(match.start(), match.end())
+            full_text = self.owner.extract_entity_text(match.start(), match.end(), lazy=True)
             extra_fields = {"parent": ""}
             self.make_add_entity(self.entity_type, name, vis, start_line, full_text, extra_fields)
         return True
@@ -62,17 +97,7 @@ class ObjectParser(EntityParser):
 class MethodParser(EntityParser):
     """Parser for JavaScript methods inside objects."""
     def __init__(self, entity_type, owner):
-        outer_regex = IterativeRegex()
-        outer_regex.add_token(
-            r"^(?P<indent>[ \t]*)(?P<spec>" + METHODS_REGEX_PATTERN + r")", ["indent", "spec", "name", "args"], 2
-        ).add_token(r"\s*{", ["head_end"], 1)
-        super().__init__(entity_type, owner, outer_regex, r"\bmethods\b|\bcomputed\b|\bwatch\b|\bfn\b", default_visibility="public")
-        self.inner_regex = IterativeRegex()
-        self.inner_regex.add_token(
-            r"^\s*(?P<name>\w+)\s*\((?P<args>[^)]*)\)", ["name", "args"], 2
-        ).add_token(
-            r"\s*{", ['head_end'], 1
-        )
+        super().__init__(entity_type, owner, _METHODS_OUTER, r"\bmethods\b|\bcomputed\b|\bwatch\b|\bfn\b", _METHODS_INNER, default_visibility="public")
 
     def _format_entity_name(self, match):
         return "methods" if self else "trash"
@@ -85,7 +110,7 @@ class MethodParser(EntityParser):
             start_line = self.owner.find_line(start_pos)
             validation = self.outer_regex.validate_match(content, start_pos)
             if validation['hit_rate'] < 0.5:
-                logging.debug(f"Skipping low hit_rate {validation['hit_rate']} for match at {start_line}")
+                logging.debug("Skipping low hit_rate %s for match at %s", validation['hit_rate'], start_line)
                 continue
             match = validation['match']
             if not match:
@@ -104,7 +129,7 @@ class MethodParser(EntityParser):
                         break
 
             full_text = self.owner.extract_entity_text(match.start(), match.end())
-            logging.debug(f"Methods part: {full_text}")
+            logging.debug("Methods part: %s", full_text)
             self.parse_inner(full_text, start_line, parent)
             # self.make_add_entity(self.entity_type, name, vis, start_line, full_text, extra_fields)
         return True
@@ -113,13 +138,7 @@ class MethodParser(EntityParser):
 class FunctionParser(EntityParser):
     """Parser for JavaScript functions."""
     def __init__(self, entity_type, owner):
-        outer_regex = IterativeRegex()
-        outer_regex.add_token(
-            BASE_REGEX_PATTERN + FN_REGEX_PATTERN, ["indent", "async", "name", "name2"], 2
-        ).add_token(
-            r"(?P<args>[^\)]*)\)(?:\s*=>)?\s*{", ["args"], 1
-        ).add_token(r"\s*{", ["head_end"], 1)
-        super().__init__(entity_type, owner, outer_regex, r"\bfunction\b|\bconst\b", default_visibility="public")
+        super().__init__(entity_type, owner, _FUNCTION_REGEX, r"\bfunction\b|\bconst\b", default_visibility="public")
 
     def _format_entity_name(self, match):
         return match.group('name') or match.group('name2') or match.group('name3')
@@ -131,13 +150,13 @@ class FunctionParser(EntityParser):
             start_line = self.owner.find_line(start_pos)
             validation = self.outer_regex.validate_match(content, start_pos)
             if validation['hit_rate'] < 0.5:
-                logging.debug(f"Skipping low hit_rate {validation['hit_rate']} for match at {start_line}")
+                logging.debug("Skipping low hit_rate %s for match at %s", validation['hit_rate'], start_line)
                 continue
             match = validation['match']
             if not match:
                 continue
             name = self._format_entity_name(match)
-            full_text = self.owner.extract_entity_text(match.start(), match.end())
+            full_text = self.owner.extract_entity_text(match.start(), match.end(), lazy=True)
             extra_fields = {"parent": ""}
             self.make_add_entity(self.entity_type, self.owner.module_prefix + name, self.default_visibility, start_line, full_text, extra_fields)
         return True
@@ -146,48 +165,19 @@ class FunctionParser(EntityParser):
 class InterfaceParser(EntityParser):
     """Parser for TypeScript interfaces."""
     def __init__(self, entity_type, owner):
-        outer_regex = IterativeRegex()
-        outer_regex.add_token(BASE_REGEX_PATTERN + INTERFACE_REGEX_PATTERN, ["indent", "vis", "name"], 2)
-        outer_regex.add_token(r"\s+extends\s+(?P<parent>\w+)", ["parent"], 1)
-        outer_regex.add_token(r"\s*{", ["head_end"], 1)
-        super().__init__(entity_type, owner, outer_regex, r"\binterface\b", default_visibility="public")
+        super().__init__(entity_type, owner, _INTERFACE_REGEX, r"\binterface\b", default_visibility="public")
 
 
 class ClassParser(EntityParser):
     """Parser for JavaScript/TypeScript classes."""
     def __init__(self, entity_type, owner):
-        outer_regex = IterativeRegex()
-        outer_regex.add_token(BASE_REGEX_PATTERN + CLASS_REGEX_PATTERN, ["indent", "vis", "name"], 2)
-        outer_regex.add_token(r"\s+extends\s+(?P<parent>\w+)", ["parent"], 1)
-        outer_regex.add_token(r"\s*{", ["head_end"], 1)
-
-        inner_regex = IterativeRegex()
-        inner_regex \
-            .add_token(
-                r'^(?P<indent>[ \t]+)'
-                r'(?:(?P<vis>public|private|protected)\s+)?'
-                r'(?:static\s+)?'
-                r'(?P<async>async\s+)?'
-                + TS_KEYWORD_EXCLUSION +
-                r'(?P<name>[a-zA-Z_$][a-zA-Z0-9_$]*)\s*\(',
-                ["indent", "vis", "async", "name"], 2
-            ) \
-            .add_token(r'(?P<args>[^)]*)\)', ["args"], 1) \
-            .add_token(r'(?:\s*:\s*[^{;\n]+?)?', ["return"], 1) \
-            .add_token(r'\s*\{', ["head_end"], 1)
-
-        super().__init__(entity_type, owner, outer_regex, r"\bclass\b", inner_regex, default_visibility="public")
+        super().__init__(entity_type, owner, _CLASS_OUTER, r"\bclass\b", _CLASS_INNER, default_visibility="public")
 
 
 class DepsParserJs(DepsParser):
     """Parser for JavaScript/TypeScript imports."""
     def __init__(self, owner):
-        outer_regex = IterativeRegex()
-        outer_regex.add_token(r"^(?P<indent>[ \t]*)import\s+{?(?P<items>[\w,\s]+)}?\s+from\s+['\"](?P<module>[^'\"]+)['\"]", ["indent", "items", "module"], 2)
-        inner_regex = IterativeRegex()
-        inner_regex.add_token(r"(?P<name>\w+)\s*(?:,|$)", ["name"], 1)
-        super().__init__(owner, outer_regex)
-        self.inner_regex = inner_regex
+        super().__init__(owner, _IMPORT_REGEX)
 
     def _process_match(self, match):
         module = match.group('module')
@@ -195,20 +185,14 @@ class DepsParserJs(DepsParser):
             self.add_module(module)
         items = match.group('items')
         if items:
-            content = items.strip()
-            for inner_match in self.inner_regex.all_matches(content):
-                validation = self.inner_regex.validate_match(content, inner_match.start())
-                if validation['hit_rate'] < 0.5:
-                    continue
-                inner_match = validation['match']
-                if inner_match:
-                    item = inner_match.group('name')
-                    self.add_import(module, item)
+            for item in _IMPORT_ITEM_REGEX.findall(items.strip()):
+                self.add_import(module, item)
 
 
 class ContentCodeJs(ContentBlock):
     """Parser for JavaScript content blocks."""
     supported_types = [".js"]
+    strips_in_parse = True
 
     def __init__(self, content_text: str, content_type: str, file_name: str, timestamp: str, **kwargs):
         super().__init__(content_text, content_type, file_name, timestamp, **kwargs)
@@ -217,11 +201,11 @@ class ContentCodeJs(ContentBlock):
         self.close_ml_string = ["`"]
         self.entity_map = {}
         self.module_prefix = kwargs.get("module_prefix", "")
-        logging.debug(f"Initialized ContentCodeJs with tag={self.tag}, file_name={file_name}, module_prefix={self.module_prefix}")
+        logging.debug("Initialized ContentCodeJs with tag=%s, file_name=%s, module_prefix=%s", self.tag, file_name, self.module_prefix)
 
     def parse_content(self, clean_lines=None, depth=0):
         """Parses JavaScript content to extract entities and dependencies."""
-        logging.debug(f"Parsing content at depth {depth} for file {self.file_name}")
+        logging.debug("Parsing content at depth %s for file %s", depth, self.file_name)
         if depth >= 2:
             self.parse_warn(f"Maximum recursion depth reached for file {self.file_name}")
             return {"entities": [], "dependencies": {"modules": [], "imports": {}}}
@@ -245,7 +229,7 @@ class ContentCodeJs(ContentBlock):
                 if parser.parse():
                     self.extend_deps(parser)
                     self.clean_lines = parser.masquerade()
-                    logging.debug(f"Applied {parser.__class__.__name__} parser, new clean_lines[1:10]: {self.clean_lines[1:10]}")
+                    logging.debug("Applied %s parser, new clean_lines[1:10]: %s", parser.__class__.__name__, self.clean_lines[1:10])
             except Exception as e:
                 logging.error(f"Error in {parser.__class__.__name__} parser for {self.file_name}: {str(e)}")
                 traceback.print_exc()
@@ -253,7 +237,7 @@ class ContentCodeJs(ContentBlock):
 
         self.clean_lines = original_clean_lines
         entities = self.sorted_entities()
-        logging.debug(f"Parsed {len(entities)} entities in {self.file_name}")
+        logging.debug("Parsed %s entities in %s", len(entities), self.file_name)
         return {"entities": entities, "dependencies": self.dependencies}
 
 
@@ -264,11 +248,11 @@ class ContentCodeTypeScript(ContentCodeJs):
     def __init__(self, content_text: str, content_type: str, file_name: str, timestamp: str, **kwargs):
         super().__init__(content_text, content_type, file_name, timestamp, **kwargs)
         self.tag = "tss"
-        logging.debug(f"Initialized ContentCodeTypeScript with tag={self.tag}, file_name={file_name}, module_prefix={self.module_prefix}")
+        logging.debug("Initialized ContentCodeTypeScript with tag=%s, file_name=%s, module_prefix=%s", self.tag, file_name, self.module_prefix)
 
     def parse_content(self, clean_lines=None, depth=0):
         """Parses TypeScript content to extract entities and dependencies."""
-        logging.debug(f"Parsing content at depth {depth} for file {self.file_name}")
+        logging.debug("Parsing content at depth %s for file %s", depth, self.file_name)
         if depth >= 2:
             self.parse_warn(f"Maximum recursion depth reached for file {self.file_name}")
             return {"entities": [], "dependencies": {"modules": [], "imports": {}}}
@@ -294,7 +278,7 @@ class ContentCodeTypeScript(ContentCodeJs):
                 if parser.parse():
                     self.extend_deps(parser)
                     self.clean_lines = parser.masquerade()
-                    logging.debug(f"Applied {parser.__class__.__name__} parser, new clean_lines[1:10]: {self.clean_lines[1:10]}")
+                    logging.debug("Applied %s parser, new clean_lines[1:10]: %s", parser.__class__.__name__, self.clean_lines[1:10])
             except Exception as e:
                 logging.error(f"Error in {parser.__class__.__name__} parser for {self.file_name}: {str(e)}")
                 traceback.print_exc()
@@ -302,7 +286,7 @@ class ContentCodeTypeScript(ContentCodeJs):
 
         self.clean_lines = original_clean_lines
         entities = self.sorted_entities()
-        logging.debug(f"Parsed {len(entities)} entities in {self.file_name}")
+        logging.debug("Parsed %s entities in %s", len(entities), self.file_name)
         return {"entities": entities, "dependencies": self.dependencies}
 
 
@@ -0,0 +1,17 @@
+# /lib/lines_view.py — lazy joined text of a clean_lines range, used for entity texts that may never be materialized.
+
+
+class LinesView:
+    """Entity text as clean_lines[first:last + 1] joined by newlines, materialized only by str()."""
+    __slots__ = ("lines", "first", "last")
+
+    def __init__(self, lines, first, last):
+        self.lines = lines
+        self.first = first
+        self.last = last
+
+    def __str__(self):
+        return "\n".join(self.lines[self.first:self.last + 1])
+
+    def line_count(self):
+        return self.last - self.first + 1
@@ -1,22 +1,83 @@
 
 import logging
-import re
-import math
+import os
+
+_tiktoken_encoding = False  # not probed yet
+
+
+def tiktoken_encoding():
+    """Returns tiktoken cl100k_base encoding when SPACK_TOKENIZER=tiktoken and tiktoken is installed, else None.
+
+    The default word/space heuristic stays in use otherwise: it needs no dependency and decomposes per line,
+    which ContentBlock.estimate_lines_tokens relies on.
+    """
+    global _tiktoken_encoding
+    if _tiktoken_encoding is False:
+        _tiktoken_encoding = None
+        if (os.environ.get("SPACK_TOKENIZER") or "").strip().lower() == "tiktoken":
+            try:
+                import tiktoken
+                _tiktoken_encoding = tiktoken.get_encoding("cl100k_base")
+            except ImportError:
+                logging.warning("SPACK_TOKENIZER=tiktoken, but tiktoken is not installed; using estimate")
+            except Exception as e:  # get_encoding fetches the BPE file on first use, may fail offline
+                logging.warning(f"SPACK_TOKENIZER=tiktoken, but cl100k_base encoding is unavailable: {str(e)}; using estimate")
+    return _tiktoken_encoding
+
+
+def tokenizer_name():
+    return "cl100k_base" if tiktoken_encoding() is not None else "estimate"
+
+
+# ceil(len / 4) by word length; map() over it keeps the per-word step out of the bytecode loop
+_WORD_TOKENS = [(n + 3) >> 2 for n in range(4096)]
+
+
+def _words_tokens(words):
+    """Word part of the estimate: ceil(len / 4) per word, which is 1 for words shorter than 5 chars."""
+    try:
+        return sum(map(_WORD_TOKENS.__getitem__, map(len, words)))
+    except IndexError:  # a word of 4096+ chars, e.g. minified or base64 payload
+        return sum([(len(word) + 3) >> 2 for word in words])
 
 
 def estimate_tokens(content):
-    """Estimates tokens by counting words and spaces more accurately."""
+    """Estimates tokens by counting words and spaces more accurately.
+
+    Words are the str.split() runs (same whitespace set as regex \\s); whitespace runs alternate
+    with them, so their count follows from the word count and the content edges without a second scan.
+    """
     if not content:
         return 0
-    tokens = 0
-    words = re.findall(r'\S+', content)
-    for word in words:
-        if len(word) >= 5:
-            tokens += math.ceil(len(word) / 4)
-        else:
-            tokens += 1
-    spaces = len(re.findall(r'\s+', content))
-    tokens += spaces
+    encoding = tiktoken_encoding()
+    if encoding is not None:
+        return len(encoding.encode_ordinary(content))
+    words = content.split()
+    if words:
+        spaces = len(words) - 1 + content[0].isspace() + content[-1].isspace()
+    else:
+        spaces = 1  # whitespace only
+    tokens = _words_tokens(words) + spaces
     logging.debug("Estimated tokens for content (length=%d): %d tokens (words=%d, spaces=%d)",
                   len(content), tokens, len(words), spaces)
     return tokens
+
+
+def line_token_stats(line):
+    """Returns (tokens, lead_ws, tail_word) of a single line for range estimates.
+
+    tokens counts words plus whitespace runs that do not start at column 0, so that
+    estimate_tokens("\\n".join(lines)) can be rebuilt from per-line values:
+    a newline opens a new space run only after a line ending with a word (tail_word),
+    and the joined text opens with a run if its first line starts with whitespace.
+    """
+    if not line:
+        return 0, 0, 0
+    words = line.split()
+    lead_ws = line[0].isspace()
+    tail_word = not line[-1].isspace()
+    if words:
+        spaces = len(words) - 1 + lead_ws + (not tail_word)
+    else:
+        spaces = 1
+    return _words_tokens(words) + spaces - lead_ws, int(lead_ws), int(tail_word)
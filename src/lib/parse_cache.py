@@ -0,0 +1,87 @@
+# /lib/parse_cache.py — on-disk cache of parse_content results keyed by content hash.
+#
+# Enabled by SPACK_PARSE_CACHE_DIR (directory path); empty/unset disables the cache.
+# Entry key covers parser version, tokenizer, block class, module_prefix, file_id and content_text,
+# so any change of the source or of the parser code bumps the key instead of reusing stale data.
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+
+from .llm_tools import tokenizer_name
+
+try:
+    import orjson
+except ImportError:  # optional, stdlib json is used without it
+    orjson = None
+
+# Bump when parser output for the same source may change.
+PARSE_CACHE_VERSION = "2"
+
+
+def cache_dir() -> Path | None:
+    raw = (os.environ.get("SPACK_PARSE_CACHE_DIR") or "").strip()
+    return Path(raw).expanduser() if raw else None
+
+
+def cache_key(block) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    head = f"{PARSE_CACHE_VERSION}\x00{tokenizer_name()}\x00{type(block).__name__}\x00{block.module_prefix}\x00{block.file_id}\x00"
+    h.update(head.encode("utf-8"))
+    h.update(block.content_text.encode("utf-8", "surrogatepass"))
+    return h.hexdigest()
+
+
+def load(block) -> dict | None:
+    """Returns cached {"entities", "dependencies", "clean_lines", "warnings", "strip_log"} for the block or None on miss."""
+    root = cache_dir()
+    if root is None:
+        return None
+    path = root / f"{cache_key(block)}.json"
+    try:
+        if orjson is not None:
+            payload = orjson.loads(path.read_bytes())
+        else:
+            with path.open("r", encoding="utf-8") as f:
+                payload = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logging.warning(f"Parse cache entry {path} unreadable: {e}")
+        return None
+    if not isinstance(payload, dict) or not isinstance(payload.get("entities"), list):
+        return None
+    return payload
+
+
+def store(block, result: dict) -> None:
+    """Writes parse result atomically (tmp + rename); failures only logged."""
+    root = cache_dir()
+    if root is None:
+        return
+    path = root / f"{cache_key(block)}.json"
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    payload = {
+        "entities": result["entities"],
+        "dependencies": result["dependencies"],
+        "clean_lines": block.clean_lines,
+        "warnings": block.warnings,  # restored on hit, the parse that produced them is skipped
+        "strip_log": block.strip_log,
+    }
+    try:
+        root.mkdir(parents=True, exist_ok=True)
+        if orjson is not None:
+            tmp.write_bytes(orjson.dumps(payload))
+        else:
+            with tmp.open("w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False)
+        os.replace(tmp, path)
+    except (OSError, TypeError, ValueError) as e:
+        logging.warning(f"Failed to store parse cache entry {path}: {e}")
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
@@ -115,6 +115,7 @@ class DepsParserPHP(DepsParser):
 class ContentCodePHP(ContentBlock):
     """Parser for PHP content blocks."""
     supported_types = [".php"]
+    strips_in_parse = True
 
     def __init__(self, content_text: str, content_type: str, file_name: str, timestamp: str, **kwargs):
         super().__init__(content_text, content_type, file_name, timestamp, **kwargs)
@@ -129,7 +130,7 @@ class ContentCodePHP(ContentBlock):
         self.escape_char = "\\"
         self.entity_map = {}
         self.module_prefix = kwargs.get("module_prefix", "")
-        logging.debug(f"Initialized ContentCodePHP with tag={self.tag}, file_name={file_name}, module_prefix={self.module_prefix}")
+        logging.debug("Initialized ContentCodePHP with tag=%s, file_name=%s, module_prefix=%s", self.tag, file_name, self.module_prefix)
 
 
 
@@ -159,7 +160,7 @@ class ContentCodePHP(ContentBlock):
 
     def parse_content(self, clean_lines=None, depth=0):
         """Parses PHP content to extract entities and dependencies."""
-        logging.debug(f"Parsing content at depth {depth} for file {self.file_name}")
+        logging.debug("Parsing content at depth %s for file %s", depth, self.file_name)
         if depth >= 2:
             self.parse_warn(f"Maximum recursion depth reached for file {self.file_name}")
             return {"entities": [], "dependencies": {"modules": [], "imports": {}}}
@@ -186,7 +187,7 @@ class ContentCodePHP(ContentBlock):
                 if parser.parse():
                     self.extend_deps(parser)
                     self.clean_lines = parser.masquerade()
-                    logging.debug(f"Applied {parser.__class__.__name__} parser, new clean_lines[1:10]: {self.clean_lines[1:10]}")
+                    logging.debug("Applied %s parser, new clean_lines[1:10]: %s", parser.__class__.__name__, self.clean_lines[1:10])
             except Exception as e:
                 logging.error(f"Error in {parser.__class__.__name__} parser for {self.file_name}: {str(e)}")
                 traceback.print_exc()
@@ -194,7 +195,7 @@ class ContentCodePHP(ContentBlock):
 
         self.clean_lines = original_clean_lines
         entities = self.sorted_entities()
-        logging.debug(f"Parsed {len(entities)} entities in {self.file_name}")
+        logging.debug("Parsed %s entities in %s", len(entities), self.file_name)
         return {"entities": entities, "dependencies": self.dependencies}
 
 
@@ -16,6 +16,10 @@ from lib.iter_regex import IterativeRegex
 BASE_REGEX_PATTERN = r"^(?P<indent>[ \t]*)(?P<spec>@classmethod\s+|@staticmethod\s+)?(?:@[\w\s()]+)?(?P<async>async\s+)?"
 FN_REGEX_PATTERN = r"def\s+(?P<name>\w+)"
 CLASS_REGEX_PATTERN = r"class\s+(?P<name>\w+)"
+_IMPORT_REGEX = re.compile(
+    r"^(?P<indent>[ \t]*)(?:from\s+([\w.]+)\s+import\s+([\w,\s]+)|import\s+(\w+))\s*$",
+    re.MULTILINE
+)  # compiled once for all DepsParserPython instances
 
 
 class ClassParser(EntityParser):
@@ -34,14 +38,14 @@ class ClassParser(EntityParser):
             start_line = self.owner.find_line(start_pos)
             validation = self.outer_regex.validate_match(content, start_pos)
             if validation['hit_rate'] < 0.5:
-                logging.debug(f"Skipping low hit_rate {validation['hit_rate']} for match at {start_line}")
+                logging.debug("Skipping low hit_rate %s for match at %s", validation['hit_rate'], start_line)
                 continue
             match = validation['match']
             if not match:
                 continue
             name = match.group('name')
             vis = "public" if not name.startswith('_') else "private" if name.startswith('__') else "protected"
-            full_text = self.owner.extract_entity_text(match.start(), match.end())
+            full_text = self.owner.extract_entity_text(match.start(), match.end(), lazy=True)
             parent = match_value(match, 'parent', '')
             indent = match_value(match, 'indent', '')
             extra_fields = {"indent": len(indent), "parent": parent}
@@ -68,7 +72,7 @@ class FunctionParser(EntityParser):
             start_line = self.owner.find_line(start_pos)
             validation = self.outer_regex.validate_match(content, start_pos)
             if validation['hit_rate'] < 0.5:
-                logging.debug(f"Skipping low hit_rate {validation['hit_rate']} for match at {start_line}")
+                logging.debug("Skipping low hit_rate %s for match at %s", validation['hit_rate'], start_line)
                 continue
             match = validation['match']
             if not match:
@@ -97,7 +101,7 @@ class FunctionParser(EntityParser):
                     if self.owner.clean_lines[i].strip().startswith('@'):
                         start_line = i
                         break
-            full_text = self.owner.extract_entity_text(match.start(), match.end())
+            full_text = self.owner.extract_entity_text(match.start(), match.end(), lazy=True)
             extra_fields = {"indent": indent, "parent": parent}
             self.make_add_entity(entity_type, self.owner.module_prefix + name, vis, start_line, full_text, extra_fields)
         return True
@@ -110,15 +114,11 @@ class DepsParserPython(DepsParser):
 
     def parse(self):
         clean_content = self.owner.get_clean_content()
-        import_regex = re.compile(
-            r"^(?P<indent>[ \t]*)(?:from\s+([\w.]+)\s+import\s+([\w,\s]+)|import\s+(\w+))\s*$",
-            re.MULTILINE
-        )
-        for match in import_regex.finditer(clean_content):
+        for match in _IMPORT_REGEX.finditer(clean_content):
             module = match.group(2) or match.group(4)
             if module:
                 self.add_module(module)
-                logging.debug(f"Found module: {module}")
+                logging.debug("Found module: %s", module)
             items = match.group(3)
             if items:
                 imports = [item.strip() for item in items.split(",") if item.strip()]
@@ -130,6 +130,7 @@ class DepsParserPython(DepsParser):
 class ContentCodePython(ContentBlock):
     """Parser for Python content blocks."""
     supported_types = [".py"]
+    strips_in_parse = True
 
     def __init__(self, content_text: str, content_type: str, file_name: str, timestamp: str, include_decorators: bool = False, **kwargs):
         super().__init__(content_text, content_type, file_name, timestamp, **kwargs)
@@ -142,7 +143,7 @@ class ContentCodePython(ContentBlock):
         self.close_ml_comment = ['"""', "'''"]
         self.entity_map = {}
         self.module_prefix = kwargs.get("module_prefix", "")
-        logging.debug(f"Initialized ContentCodePython with tag={self.tag}, file_name={file_name}, module_prefix={self.module_prefix}, include_decorators={include_decorators}")
+        logging.debug("Initialized ContentCodePython with tag=%s, file_name=%s, module_prefix=%s, include_decorators=%s", self.tag, file_name, self.module_prefix, include_decorators)
 
     def detect_bounds(self, start_line, clean_lines):
         """Detects the start and end line of an entity using indentation levels.
@@ -178,11 +179,11 @@ class ContentCodePython(ContentBlock):
                 line_num += 1
                 continue
             line_indent = len(line) - len(line.lstrip())
-            for other_entity in self.entity_map.values():
-                if other_entity["first_line"] == line_num and other_entity["indent"] <= indent:
-                    return header_last_line, last_line
+            other_entity = self.entity_map.get(line_num)  # entity_map is keyed by first_line
+            if other_entity and other_entity["indent"] <= indent:
+                return header_last_line, last_line
             if line_indent <= indent and line_num > header_last_line:
-                logging.debug(f"DETECT_BOUNDS: new indent {line_indent} <= {indent} at @{line_num}")
+                logging.debug("DETECT_BOUNDS: new indent %s <= %s at @%s", line_indent, indent, line_num)
                 return header_last_line, last_line
             if line_indent > indent:
                 last_line = line_num
@@ -191,7 +192,7 @@ class ContentCodePython(ContentBlock):
 
     def parse_content(self, clean_lines=None, depth=0):
         """Parses Python content to extract entities and dependencies."""
-        logging.debug(f"Parsing content at depth {depth} for file {self.file_name}")
+        logging.debug("Parsing content at depth %s for file %s", depth, self.file_name)
         if depth >= 2:
             self.parse_warn(f"Maximum recursion depth reached for file {self.file_name}")
             return {"entities": [], "dependencies": {"modules": [], "imports": {}}}
@@ -215,7 +216,7 @@ class ContentCodePython(ContentBlock):
                 if parser.parse():
                     self.extend_deps(parser)
                     self.clean_lines = parser.masquerade()
-                    logging.debug(f"Applied {parser.__class__.__name__} parser, new clean_lines[1:10]: {self.clean_lines[1:10]}")
+                    logging.debug("Applied %s parser, new clean_lines[1:10]: %s", parser.__class__.__name__, self.clean_lines[1:10])
             except Exception as e:
                 logging.error(f"Error in {parser.__class__.__name__} parser for {self.file_name}: {str(e)}")
                 traceback.print_exc()
@@ -223,7 +224,7 @@ class ContentCodePython(ContentBlock):
 
         self.clean_lines = original_clean_lines
         entities = self.sorted_entities()
-        logging.debug(f"Parsed {len(entities)} entities in {self.file_name}")
+        logging.debug("Parsed %s entities in %s", len(entities), self.file_name)
         return {"entities": entities, "dependencies": self.dependencies}
 
 
@@ -11,21 +11,67 @@ from lib.sandwich_pack import SandwichPack
 from lib.entity_parser import EntityParser, match_value
 from lib.deps_builder import DepsParser
 from lib.iter_regex import IterativeRegex
-
-
-BASE_REGEX_PATTERN = r"^(?:#\[(?P<spec>.*)?\]\s*)?(?P<indent>[ \t]*)(?P<vis>pub\s+)?"
-FN_REGEX_PATTERN = r"(?P<async>async\s+)?fn\s+(?P<name>\w+)"
-ARGS_REGEX_PATTERN = r"\s*\((?P<args>([^;^\{]+)\)?)\s*"
-RET_REGEX_PATTERN = r"(?:->\s*(?P<return>[^;^\{]+))?"
+from lib import parse_cache
+
+
+# attribute body is consumed in `]`-delimited runs: on a failed header the engine backs off
+# one `]` at a time (same capture as greedy `.*`) instead of one character at a time
+BASE_REGEX_PATTERN = r"^(?:#\[(?P<spec>[^\]\n]*+(?:\][^\]\n]*+)*)\]\s*+)?(?P<indent>[ \t]*)(?P<vis>pub\s++)?"
+# possessive quantifiers (Python 3.11+) keep header matching linear on malformed input: no adjacent
+# subpatterns may trade the same characters back and forth while backtracking
+FN_REGEX_PATTERN = r"(?P<async>async\s++)?fn\s++(?P<name>\w++)"
+ARGS_REGEX_PATTERN = r"\s*+\((?P<args>[^;^\{]++)\s*+"
+RET_REGEX_PATTERN = r"(?:->\s*+(?P<return>[^;^\{]++))?"
+# single pass over clean content to learn which declaration kinds are present at all
+DECL_KEYWORDS_REGEX = re.compile(r"\b(use|mod|struct|trait|impl|fn)\b")
+# nested `mod` blocks are parsed recursively, one sub-parser level per module level
+MAX_MODULE_DEPTH = 32
+
+# IterativeRegex sets are read-only after construction, so all parser instances share them
+_MOD_REGEX = IterativeRegex()\
+    .add_token(BASE_REGEX_PATTERN + r"mod\s+(?P<name>\w+)", ["indent", "vis", "name"], 2)\
+    .add_token(r"\s*{", ["head_end"], 1)
+_TRAIT_OUTER = IterativeRegex()\
+    .add_token(BASE_REGEX_PATTERN + r"trait\s+(?P<name>\w+)", ["indent", "vis", "name"], 2)\
+    .add_token(r"(?:\:\s*+(?P<parent>[\+\w\s]++))?", ["parent"], 1)\
+    .add_token(r"\s*{", ["head_end"], 1)
+_TRAIT_INNER = IterativeRegex()\
+    .add_token(BASE_REGEX_PATTERN + FN_REGEX_PATTERN, ["indent", "vis", "async", "name"], 2)\
+    .add_token(ARGS_REGEX_PATTERN, ["args"], 1)\
+    .add_token(RET_REGEX_PATTERN, ["return"], 1)\
+    .add_token(r";", ["head_end"], 1)  # abstract method
+# possible very simple impl definition, without "for Struct"
+_IMPL_OUTER = IterativeRegex()\
+    .add_token(BASE_REGEX_PATTERN + r"impl\s+(?P<name>\w+)", ["indent", "vis", "name"], 2)\
+    .add_token(r"\s++(?:for\s++(?P<struct_name>\w++))?", ["struct_name"], 1)\
+    .add_token(r"\s*{", ["head_end"], 1)
+_IMPL_INNER = IterativeRegex()\
+    .add_token(BASE_REGEX_PATTERN + FN_REGEX_PATTERN, ["indent", "vis", "async", "name"], 2)\
+    .add_token(ARGS_REGEX_PATTERN, ["args"], 1)\
+    .add_token(RET_REGEX_PATTERN, ["return"], 1)\
+    .add_token(r"{", ["head_end"], 1)
+_FN_REGEX = IterativeRegex()\
+    .add_token(BASE_REGEX_PATTERN + FN_REGEX_PATTERN, ["indent", "vis", "async", "name"], 2)\
+    .add_token(ARGS_REGEX_PATTERN, ["args"], 1)\
+    .add_token(RET_REGEX_PATTERN, ["return"], 1)\
+    .add_token(r"{", ["head_end"], 1)
+_STRUCT_REGEX = IterativeRegex()\
+    .add_token(BASE_REGEX_PATTERN + r"struct\s+(?P<name>\w+)", ["indent", "vis", "name"], 2)\
+    .add_token(r"(?:<[^{;\n]*>)?\s*{", ["head_end"], 1)  # generics may nest, but never span `{`
+_DEPS_OUTER = IterativeRegex()\
+    .add_token(r"^(?P<indent>[ \t]*)use\s++(?:crate::{)?(?P<imports>([^;]++))?", ["indent", "imports"], 2)\
+    .add_token(';', ['head_end'], 1)
+_DEPS_INNER = IterativeRegex()\
+    .add_token(r"\s*(?P<module>[\w:]+)\s*", ["module"], 2)\
+    .add_token(r"(?:{\s*(?P<items>[^}]+)})?", ["items"], 1)\
+    .add_token(r"(?:,|$)", ["breaker"], 1)
 
 
 class ModuleParser(EntityParser):
     """Parser for Rust modules with recursive parsing."""
     def __init__(self, entity_type, owner):
-        outer_regex = IterativeRegex()
-        outer_regex.add_token(BASE_REGEX_PATTERN + r"mod\s+(?P<name>\w+)", ["indent", "vis", "name"], 2)
-        outer_regex.add_token(r"\s*{", ["head_end"], 1)
-        super().__init__(entity_type, owner, outer_regex, r"\bmod\b", default_visibility="private")
+        super().__init__(entity_type, owner, _MOD_REGEX, r"\bmod\b", default_visibility="private", fast_screen="mod")
+        self.sub_parser = None  # reused for every module of the owner via reset()
 
     def _process_match(self, match):
         """Process a module match and perform recursive parsing."""
@@ -35,26 +81,31 @@ class ModuleParser(EntityParser):
         vis = "public" if match.groupdict().get('vis') else "private"
         name_final = f"{self.owner.module_prefix}{module_name}"
         full_text = self.owner.extract_entity_text(match.start(), match.end())
-        logging.debug(f"Processing module {name_final} at line {start_line}, text: {full_text!r}")
+        logging.debug("Processing module %s at line %s, text: %r", name_final, start_line, full_text)
         if not self.make_add_entity(self.entity_type, name_final, vis, start_line, full_text, {"parent": ""}):
             return False
 
-        module_lines = self.owner.extract_entity_text(match.start(), match.end()).splitlines()
+        module_lines = full_text.splitlines()
         module_size = len(module_lines)
-        sub_clean_lines = self.owner.clean_lines.copy()
         end_line = start_line + module_size
-        for i in range(0, len(sub_clean_lines)):
-            if i < start_line + 1 or i > end_line - 1:
-                sub_clean_lines[i] = f"// ext. line #{i}"
-        masked_content = "\n".join(sub_clean_lines[1:])
-        sub_parser = ContentCodeRust(
-            masked_content, self.owner.content_type,
-            f"{self.owner.file_name}&{module_name}", self.owner.timestamp,
-            module_prefix=f"{self.owner.module_prefix}{module_name}."
-        )
-        sub_result = sub_parser.parse_content(sub_clean_lines, depth=1)
+        # sub-parser sees only the module body; its line i maps to owner line start_line + i
+        sub_clean_lines = [""] + self.owner.clean_lines[start_line + 1:end_line]
+        sub_content = "\n".join(sub_clean_lines[1:])
+        sub_file_name = f"{self.owner.file_name}&{module_name}"
+        sub_prefix = f"{self.owner.module_prefix}{module_name}."
+        if self.sub_parser is None:
+            self.sub_parser = ContentCodeRust(
+                sub_content, self.owner.content_type,
+                sub_file_name, self.owner.timestamp,
+                module_prefix=sub_prefix
+            )
+        else:
+            self.sub_parser.reset(sub_content, sub_file_name, sub_prefix)
+        sub_result = self.sub_parser.parse_content(sub_clean_lines, depth=self.owner.parse_depth + 1)
         for sub_entity in sub_result["entities"]:
             if isinstance(sub_entity, dict):
+                sub_entity['first_line'] += start_line
+                sub_entity['last_line'] += start_line
                 first_line = sub_entity['first_line']
                 if first_line in self.owner.entity_map:
                     logging.error(f"Already exists entity {self.owner.entity_map[first_line]}, can't add {sub_entity}")
@@ -69,37 +120,14 @@ class ModuleParser(EntityParser):
 class TraitParser(EntityParser):
     def __init__(self, entity_type, owner):
         self.current_struct = ""
-        outer_regex = IterativeRegex()
-        outer_regex\
-            .add_token(BASE_REGEX_PATTERN + r"trait\s+(?P<name>\w+)", ["indent", "vis", "name"], 2)\
-            .add_token(r"(?:\:\s*(?P<parent>[\+\w\s]+))?", ["parent"], 1)\
-            .add_token(r"\s*{", ["head_end"], 1)
-        inner_regex = IterativeRegex()   # abstract method
-        inner_regex\
-            .add_token(BASE_REGEX_PATTERN + FN_REGEX_PATTERN, ["indent", "vis", "async", "name"], 2)\
-            .add_token(ARGS_REGEX_PATTERN, ["args"], 1)\
-            .add_token(RET_REGEX_PATTERN, ["return"], 1)\
-            .add_token(r";", ["head_end"], 1)
-        super().__init__(entity_type, owner, outer_regex, r"\btrait\b|\bfn\b", inner_regex, default_visibility="private"),
+        super().__init__(entity_type, owner, _TRAIT_OUTER, r"\btrait\b|\bfn\b", _TRAIT_INNER, default_visibility="private", fast_screen="trait")
 
 
 class TraitImplParser(EntityParser):
     """Parser for Rust trait implementations and their methods."""
     def __init__(self, entity_type, owner):
         self.current_struct = ""
-        outer_regex = IterativeRegex()
-        # possible very simple impl definition, without "for Struct"
-        outer_regex\
-            .add_token(BASE_REGEX_PATTERN + r"impl\s+(?P<name>\w+)", ["indent", "vis", "name"], 2)\
-            .add_token(r"\s+(?:for\s+(?P<struct_name>\w+))?", ["struct_name"], 1)\
-            .add_token(r"\s*{", ["head_end"], 1)
-        inner_regex = IterativeRegex()
-        inner_regex\
-            .add_token(BASE_REGEX_PATTERN + FN_REGEX_PATTERN, ["indent", "vis", "async", "name"], 2)\
-            .add_token(ARGS_REGEX_PATTERN, ["args"], 1)\
-            .add_token(RET_REGEX_PATTERN, ["return"], 1)\
-            .add_token(r"{", ["head_end"], 1)
-        super().__init__(entity_type, owner, outer_regex, r"\bimpl\b|\bfn\b", inner_regex, default_visibility="private")
+        super().__init__(entity_type, owner, _IMPL_OUTER, r"\bimpl\b|\bfn\b", _IMPL_INNER, default_visibility="private", fast_screen="impl")
 
     def _format_entity_name(self, match):
         name = match.group("name")
@@ -112,35 +140,16 @@ class TraitImplParser(EntityParser):
 class FunctionParser(EntityParser):
     """Parser for Rust functions."""
     def __init__(self, entity_type, owner):
-        outer_regex = IterativeRegex()
-        outer_regex.add_token(BASE_REGEX_PATTERN + r"(?P<async>async\s+)?fn\s+(?P<name>\w+)", ["indent", "vis", "async", "name"], 2)\
-            .add_token(ARGS_REGEX_PATTERN, ["args"], 1)\
-            .add_token(RET_REGEX_PATTERN, ["return"], 1)\
-            .add_token(r"{", ["head_end"], 1)
-        super().__init__(entity_type, owner, outer_regex, r"\bfn\b", default_visibility="private")
+        super().__init__(entity_type, owner, _FN_REGEX, r"\bfn\b", default_visibility="private", fast_screen="fn")
 
 
 class DepsParserRust(DepsParser):
     """Parser for Rust imports."""
     def __init__(self, owner):
-        outer_regex = IterativeRegex()
-        outer_regex.add_token(
-            r"^(?P<indent>[ \t]*)use\s+(?:crate::{)?(?P<imports>([^;]+))?",
-            ["indent", "imports"], 2
-        ).add_token(
-            ';', ['head_end'], 1
-        )
-        inner_regex = IterativeRegex()
-        inner_regex.add_token(
-            r"\s*(?P<module>[\w:]+)\s*", ["module"], 2
-        ).add_token(
-            r"(?:{\s*(?P<items>[^}]+)})?", ["items"], 1
-        ).add_token(
-            r"(?:,|$)", ["breaker"], 1
-        )
-        super().__init__(owner, outer_regex)
+        super().__init__(owner, _DEPS_OUTER)
+        self.fast_screen = "use"
         # "^[ \t]*use[ \t]+",\
-        self.inner_regex = inner_regex
+        self.inner_regex = _DEPS_INNER
 
     def process_imports(self, imports, parent_module=''):
         if len(imports) < 3:
@@ -148,10 +157,8 @@ class DepsParserRust(DepsParser):
         limit = imports.find(';')
         if limit > 0:
             imports = imports[:limit]  # always need cutout between use and ;
-        modules = self.inner_regex.all_matches(imports)
-        for module in modules:  # single line use xx::yy
-            validation = self.inner_regex.validate_match(imports, module.start())
-            logging.debug(f" checking modules import from: `{module.group(0)}`")
+        for module, validation in self.inner_regex.iter_matches(imports):  # single line use xx::yy
+            logging.debug(" checking modules import from: `%s`", module.group(0))
             if validation['hit_rate'] < 0.1:
                 logging.warning(" hit_rate too small")
                 continue
@@ -162,7 +169,7 @@ class DepsParserRust(DepsParser):
                 mod_chain = parent_module + "::" + mod_chain
 
             if items:
-                logging.debug(f" detected multiply items: {items} in {mod_chain}")
+                logging.debug(" detected multiply items: %s in %s", items, mod_chain)
                 if "::" in items:
                     logging.debug(" recursion processing scan...")
                     return self.process_imports(items, mod_chain)
@@ -173,7 +180,7 @@ class DepsParserRust(DepsParser):
                 return True
 
             elif mod_chain:
-                logging.debug(f"Single line import detected: {mod_chain}")
+                logging.debug("Single line import detected: %s", mod_chain)
                 chain = mod_chain.split('::')
                 name = chain.pop()
                 module = '::'.join(chain)
@@ -188,7 +195,7 @@ class DepsParserRust(DepsParser):
         if not imports:
             logging.warning(f"No `imports` match in group at {match.start()}, detected crate?")
             return False
-        logging.debug(f"Global processing imports:\n {imports}")
+        logging.debug("Global processing imports:\n %s", imports)
         for line in imports.splitlines():
             self.process_imports(line.strip())
         return True
@@ -199,6 +206,7 @@ class DepsParserRust(DepsParser):
 class ContentCodeRust(ContentBlock):
     """Parser for Rust content blocks."""
     supported_types = [".rs"]
+    strips_in_parse = True
 
     def __init__(self, content_text: str, content_type: str, file_name: str, timestamp: str, **kwargs):
         super().__init__(content_text, content_type, file_name, timestamp, **kwargs)
@@ -209,7 +217,21 @@ class ContentCodeRust(ContentBlock):
         self.open_ml_string = ["r#\""]
         self.close_ml_string = ["\"#"]
         self.module_prefix = kwargs.get("module_prefix", "")
-        logging.debug(f"Initialized ContentCodeRust with tag={self.tag}, file_name={file_name}, module_prefix={self.module_prefix}")
+        self.parse_depth = 0
+        logging.debug("Initialized ContentCodeRust with tag=%s, file_name=%s, module_prefix=%s", self.tag, file_name, self.module_prefix)
+
+    def reset(self, content_text: str, file_name: str, module_prefix: str):
+        """Re-targets this block at another module text, keeping settings from __init__ (sub-parser reuse)."""
+        self.content_text = content_text
+        self.line_count = content_text.count("\n") + 1
+        self.file_name = file_name
+        self.module_prefix = module_prefix
+        self.clean_lines = [""]
+        self.line_offsets = []
+        self.entity_map = {}
+        self.dependencies = {"modules": [], "imports": {}}
+        self.strip_log = []
+        self.warnings = []
 
     def check_lines_match(self, offset, full_clean_lines):
         """Validates that clean_lines matches full_clean_lines at the given offset."""
@@ -239,29 +261,43 @@ class ContentCodeRust(ContentBlock):
 
     def parse_content(self, clean_lines=None, depth=0):
         """Parses Rust content to extract entities and dependencies."""
-        logging.debug(f"Parsing content at depth {depth} for file {self.file_name}")
-        if depth >= 2:
+        logging.debug("Parsing content at depth %s for file %s", depth, self.file_name)
+        if depth >= MAX_MODULE_DEPTH:
             self.parse_warn(f"Maximum recursion depth reached for file {self.file_name}")
             return {"entities": [], "dependencies": {"modules": [], "imports": {}}}
+        self.parse_depth = depth
+        use_cache = clean_lines is None and depth == 0
+        if use_cache:
+            cached = parse_cache.load(self)
+            if cached is not None:
+                logging.debug("Parse cache hit for file %s", self.file_name)
+                self.clean_lines = cached["clean_lines"]
+                self.entity_map = {e["first_line"]: e for e in cached["entities"]}
+                self.dependencies = cached["dependencies"]
+                self.warnings.extend(cached.get("warnings", []))  # kept, but not logged again
+                self.strip_log.extend(cached.get("strip_log", []))
+                return {"entities": self.sorted_entities(), "dependencies": self.dependencies}
         self.entity_map = {}
         self.clean_lines = clean_lines if clean_lines is not None else ([""] + self.content_text.splitlines())
         self.strip_strings()
         self.strip_comments()
 
-        struct_regex = IterativeRegex()
-        struct_regex\
-            .add_token(BASE_REGEX_PATTERN + r"struct\s+(?P<name>\w+)", ["indent", "vis", "name"], 2)\
-            .add_token(r"(?:<.*?>)?\s*{", ["head_end"], 1)
-
-        parsers = [
-            DepsParserRust(self),
-            ModuleParser("module", self),
-            EntityParser("structure", self, struct_regex, r"\bstruct\b", default_visibility="private"),
-            TraitParser("interface", self),
-            TraitImplParser("class", self),
-            FunctionParser("function", self)
+        keywords = set()
+        for match in DECL_KEYWORDS_REGEX.finditer(self.get_clean_content()):
+            keywords.add(match.group(1))
+            if len(keywords) == 6:
+                break
+
+        parser_factories = [
+            ("use", lambda: DepsParserRust(self)),
+            ("mod", lambda: ModuleParser("module", self)),
+            ("struct", lambda: EntityParser("structure", self, _STRUCT_REGEX, r"\bstruct\b", default_visibility="private", fast_screen="struct")),
+            ("trait", lambda: TraitParser("interface", self)),
+            ("impl", lambda: TraitImplParser("class", self)),
+            ("fn", lambda: FunctionParser("function", self))
         ]
-        # Initialize structure and interface regexes
+        # parsers without their declaration keyword in the file can't match anything, skip them
+        parsers = [factory() for keyword, factory in parser_factories if keyword in keywords]
 
         for parser in parsers:
             try:
@@ -275,8 +311,11 @@ class ContentCodeRust(ContentBlock):
                 break
 
         entities = self.sorted_entities()
-        logging.debug(f"Parsed {len(entities)} entities in {self.file_name}")
-        return {"entities": entities, "dependencies": self.dependencies}
+        logging.debug("Parsed %s entities in %s", len(entities), self.file_name)
+        result = {"entities": entities, "dependencies": self.dependencies}
+        if use_cache:
+            parse_cache.store(self, result)
+        return result
 
 
 SandwichPack.register_block_class(ContentCodeRust)
\ No newline at end of file
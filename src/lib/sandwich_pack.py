@@ -2,26 +2,132 @@
 # Formatted with proper line breaks and indentation for project compliance.
 
 import hashlib
-import importlib.util
 import os
 import re
+import sys
 import logging
-import datetime
+import time
 import json
-import math
-import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 from .content_block import ContentBlock, ContextPatchBlock, estimate_tokens
 from .deps_builder import organize_modules
 from .file_type_detector import DOCUMENT_EXTENSIONS, TEXT_FILE_EXTENSIONS
 
+try:
+    import orjson
+except ImportError:  # optional, stdlib json is used without it
+    orjson = None
 
-def compute_md5(content: str) -> str:
-    return hashlib.md5(content.encode("utf-8")).hexdigest()
+try:
+    import xxhash
+except ImportError:  # optional, only needed for SPACK_FILE_HASH=xxh3
+    xxhash = None
+
+PARSE_POOL_MIN_CHARS = 16_384  # below this total input size blocks are parsed serially
+PARSE_POOL_CHUNK = 4  # blocks per worker task, amortizes inter-process round trips
+HASH_THREADS_MIN_BYTES = 4 << 20  # below this total size file list digests are computed serially
+PARSE_STATE_FIELDS = ("entity_map", "dependencies", "warnings")  # block attributes a pool worker sends back
+
+
+def compute_md5(content: str | bytes) -> str:
+    # content fingerprint for the file list, not a security primitive
+    data = content.encode("utf-8") if isinstance(content, str) else content
+    return hashlib.md5(data, usedforsecurity=False).hexdigest()
+
+
+def compute_xxh3(content: str | bytes) -> str:
+    data = content.encode("utf-8") if isinstance(content, str) else content
+    return xxhash.xxh3_64_hexdigest(data)
+
+
+def compute_blake2b(content: str | bytes) -> str:
+    data = content.encode("utf-8") if isinstance(content, str) else content
+    return hashlib.blake2b(data, digest_size=16).hexdigest()  # same 32 hex chars as md5
+
+
+def file_hash_name() -> str:
+    """Digest used for the file list, selected by SPACK_FILE_HASH: "xxh3" (needs xxhash), "blake2b" or "md5" (default)."""
+    name = (os.environ.get("SPACK_FILE_HASH") or "").strip().lower()
+    if name == "xxh3":
+        if xxhash is not None:
+            return "xxh3"
+        logging.warning("SPACK_FILE_HASH=xxh3, but xxhash is not installed; using md5")
+    elif name == "blake2b":
+        return "blake2b"
+    return "md5"
+
+
+def compute_file_digests(chunks: list[bytes], hash_name: str = "md5") -> list[str]:
+    """Digests of independent byte chunks, in order.
+
+    hashlib and xxhash release the GIL while hashing large buffers, so for a large project
+    the chunks are spread over a thread pool and hashed on several cores at once.
+    """
+    digest = {"xxh3": compute_xxh3, "blake2b": compute_blake2b}.get(hash_name, compute_md5)
+    workers = min(os.cpu_count() or 1, 8)
+    if workers <= 1 or len(chunks) <= 1 or sum(map(len, chunks)) < HASH_THREADS_MIN_BYTES:
+        return [digest(chunk) for chunk in chunks]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(digest, chunks))
+
+
+def utf8_len(text: str) -> int:
+    """UTF-8 byte length; ASCII text (most source code) is measured without building an encoded copy."""
+    return len(text) if text.isascii() else len(text.encode("utf-8"))
+
+
+_JSON_NON_ASCII = re.compile(r"[^\x00-\x7e]")  # chars json.dumps(ensure_ascii=True) writes as \uXXXX
+
+
+def _json_escape_char(match) -> str:
+    code = ord(match.group())
+    if code > 0xFFFF:  # astral chars become a surrogate pair, as json.dumps does
+        code -= 0x10000
+        return "\\u{0:04x}\\u{1:04x}".format(0xD800 | (code >> 10), 0xDC00 | (code & 0x3FF))
+    return "\\u{0:04x}".format(code)
+
+
+def dump_index(data) -> str:
+    """Index JSON with 2-space indent; orjson when installed, output kept identical to json.dumps(data, indent=2)."""
+    if orjson is not None:
+        try:
+            text = orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode("utf-8")
+        except TypeError:  # orjson.JSONEncodeError, e.g. ints beyond 64 bit or lone surrogates
+            text = None
+        if text is not None:
+            if not text.isascii() or "\x7f" in text:  # orjson keeps raw UTF-8, json.dumps escapes it
+                text = _JSON_NON_ASCII.sub(_json_escape_char, text)
+            return text
+    return json.dumps(data, indent=2)
+
+
+def _parse_block(block):
+    """Strips and parses one block in place."""
+    if not block.strips_in_parse:  # code blocks strip inside parse_content, a second pass here is discarded
+        block.strip_strings()
+        block.strip_comments()
+    return block, block.parse_content()
+
+
+def _parse_block_state(class_name: str, state: dict):
+    """Process pool worker: rebuilds a block from its attributes, parses it, returns parse outputs and result.
+
+    Block classes are passed by name, since load_block_classes() imports *_block modules outside of the lib package.
+    Only PARSE_STATE_FIELDS come back: content_text is unchanged, and pack() reads neither the stripped
+    clean_lines, the strip_log debug trace nor the derived caches (clean_content_cache, tokens_index,
+    line_stats, bounds_cache), which would multiply the pickled result.
+    """
+    block_class = SandwichPack.block_class_by_name(class_name)
+    block = block_class.__new__(block_class)
+    block.__dict__.update(state)
+    _, parsed = _parse_block(block)
+    return {k: getattr(block, k) for k in PARSE_STATE_FIELDS}, parsed
 
 
 class SandwichPack:
     _block_classes = []
+    _type_to_class = {}  # content_type -> first registered block class supporting it
     _NON_CODE_CONTENT_TYPES = {
         ":post",
         ":context_patch",
@@ -46,25 +152,34 @@ class SandwichPack:
             }
         }
         self.busy_ids = set()
+        self.next_file_id = 0  # ids below are all busy; busy_ids only grows until pack() clears it
 
     @classmethod
     def register_block_class(cls, block_class):
-        logging.debug(f"Registering block class: {block_class.__name__}")
+        # a *_block module imported both as lib.<name> and via load_block_classes() defines the class twice
+        if any(c.__name__ == block_class.__name__ for c in cls._block_classes):
+            logging.debug("Block class %s already registered, skipped", block_class.__name__)
+            return
+        logging.debug("Registering block class: %s", block_class.__name__)
         cls._block_classes.append(block_class)
+        for content_type in block_class.supported_types:
+            cls._type_to_class.setdefault(content_type, block_class)
 
     @classmethod
     def load_block_classes(cls):
+        import importlib.util  # deferred: only needed when scanning *_block.py plugins
         for module in Path(__file__).parent.glob("*_block.py"):
             module_name = module.stem
-            if module_name == "content_block":
-                continue
+            if module_name == "content_block" or f"{__package__}.{module_name}" in sys.modules:
+                continue  # already imported as package module, its class is registered
             try:
                 spec = importlib.util.spec_from_file_location(module_name, module)
                 mod = importlib.util.module_from_spec(spec)
                 spec.loader.exec_module(mod)
-                logging.debug(f"Loaded module: {module_name}")
+                logging.debug("Loaded module: %s", module_name)
             except Exception as e:
                 logging.error(f"Failed to load module {module_name}: {str(e)}")
+                import traceback
                 stack = traceback.format_exception(type(e), e, e.__traceback__)
                 logging.info(f"TRACEBACK: " + ''.join(stack))
         _names = {c.__name__ for c in cls._block_classes}
@@ -73,28 +188,31 @@ class SandwichPack:
         return cls._block_classes
 
     @classmethod
-    def supported_type(cls, content_type: str) -> bool:
+    def block_class_by_name(cls, class_name: str):
+        if not cls._block_classes:
+            cls.load_block_classes()
         for block_class in cls._block_classes:
-            if content_type in block_class.supported_types:
-                logging.debug(f"Supported content_type={content_type} by {block_class.__name__}")
-                return True
-        return content_type in ContentBlock.supported_types
+            if block_class.__name__ == class_name:
+                return block_class
+        return ContentBlock
+
+    @classmethod
+    def supported_type(cls, content_type: str) -> bool:
+        return content_type in cls._type_to_class or content_type in ContentBlock.supported_types
 
     @classmethod
     def create_block(cls, content_text: str, content_type: str, file_name=None,
                     timestamp=None, **kwargs) -> ContentBlock:
-        for block_class in cls._block_classes:
-            if content_type in block_class.supported_types:
-                logging.debug(f"Creating block with {block_class.__name__} for content_type={content_type}")
-                return block_class(content_text, content_type, file_name, timestamp, **kwargs)
-        return ContentBlock(content_text, content_type, file_name, timestamp, **kwargs)
+        block_class = cls._type_to_class.get(content_type, ContentBlock)
+        return block_class(content_text, content_type, file_name, timestamp, **kwargs)
 
     def generate_unique_file_id(self) -> int:
-        file_id = 0
+        file_id = self.next_file_id
         while file_id in self.busy_ids:
             file_id += 1
         self.busy_ids.add(file_id)
-        logging.debug(f"Generated unique file_id={file_id}")
+        self.next_file_id = file_id + 1
+        logging.debug("Generated unique file_id=%s", file_id)
         return file_id
 
     def find_entity(self, e_type: str, e_name: str, file_id=None):
@@ -107,34 +225,29 @@ class SandwichPack:
         return ctype not in cls._NON_CODE_CONTENT_TYPES
 
     @staticmethod
-    def _index_redundancy_warning(file_list: list[str], entities_list: list[str]) -> dict | None:
+    def _index_redundancy_warning(file_rows: list[tuple], entity_rows: list[tuple]) -> dict | None:
         """
         Warn when index payload is likely dominated by non-code files.
         Rule: files > 1000 and files-with-entities / files < 10%.
+        Rows are the raw field tuples of the "files" and "entities" index lists.
         """
-        total_files = len(file_list)
+        total_files = len(file_rows)
         if total_files <= 1000:
             return None
 
         file_path_by_id: dict[int, str] = {}
-        for row in file_list:
-            parts = row.split(",", 4)
-            if len(parts) < 5:
-                continue
+        for row in file_rows:
             try:
-                fid = int(parts[0].strip())
-            except ValueError:
+                fid = int(row[0])
+            except (TypeError, ValueError):
                 continue
-            file_path_by_id[fid] = parts[1].strip()
+            file_path_by_id[fid] = str(row[1]).strip()
 
         code_file_ids: set[int] = set()
-        for row in entities_list:
-            parts = row.split(",")
-            if len(parts) < 7:
-                continue
+        for row in entity_rows:
             try:
-                code_file_ids.add(int(parts[4].strip()))
-            except ValueError:
+                code_file_ids.add(int(row[4]))
+            except (TypeError, ValueError):
                 continue
 
         code_files = len(code_file_ids)
@@ -176,32 +289,66 @@ class SandwichPack:
             ),
         }
 
-    def pack(self, blocks, users=None) -> dict:
-        """Packs content blocks into sandwiches with an index including entity boundaries."""
+    def parse_blocks(self, blocks):
+        """Yields (block, parsed) in input order; with SPACK_PARSE_WORKERS > 1 parsing runs in a process pool.
+
+        Compression needs the parser objects (imports of DepsParser) kept in block.parsers, which can't leave
+        a worker process, so with compression enabled parsing stays serial. Pooled blocks take back only
+        PARSE_STATE_FIELDS, their clean_lines stay unstripped.
+        """
+        raw = (os.environ.get("SPACK_PARSE_WORKERS") or "").strip()
+        try:
+            workers = (os.cpu_count() or 1) if raw.lower() == "auto" else int(raw) if raw else 0
+        except ValueError:
+            logging.warning(f"Invalid SPACK_PARSE_WORKERS={raw!r}, parsing serially")
+            workers = 0
+        if workers > 1 and sum(len(b.content_text) for b in blocks) < PARSE_POOL_MIN_CHARS:
+            workers = 0  # worker startup and pickling outweigh parsing of a small input
+        if workers <= 1 or len(blocks) <= 1 or self.compression:
+            for block in blocks:
+                yield _parse_block(block)
+            return
+        with ProcessPoolExecutor(max_workers=min(workers, len(blocks))) as pool:
+            results = pool.map(_parse_block_state, [type(b).__name__ for b in blocks], [b.__dict__ for b in blocks],
+                               chunksize=PARSE_POOL_CHUNK)
+            for block, (state, parsed) in zip(blocks, results):
+                block.__dict__.update(state)  # keep caller's block objects, take parse outputs
+                yield block, parsed
+
+    def pack(self, blocks, users=None, sandwich_writer=None) -> dict:
+        """Packs content blocks into sandwiches with an index including entity boundaries.
+
+        sandwich_writer: optional callable(sandwich_number) returning a writable text file context; each sandwich
+        is written there as soon as it is complete and "sandwiches" in the result stays empty, instead of keeping
+        all packed text in memory.
+        """
         try:
             self.busy_ids.clear()
+            self.next_file_id = 0
             file_map = {}
-            file_list = []
+            file_rows = []  # field lists, joined into "files" rows once after the loops
+            block_texts = {}  # id(block) -> (to_sandwich_block() text, UTF-8 size) from the file list, reused on emission
+            file_chunks = []  # encoded file blocks, hashed in one batch after the loop
             entity_stor = {}
             self.entities = []
-            entities_list = []
-            name_to_locations = {}
+            entity_rows = []
             module_map = {}
             module_list = []
             parsed_blocks = []
+            pending = []  # file blocks in input order, parsed after file ids are assigned
             code_base_file_ids: set[int] = set()
             file_blocks = 0
 
+            # one sweep collects the busy ids before any id is generated; first sandwich part is chat messages
             for block in blocks:
-                if block.content_type != ":post" and block.file_id is not None:
+                content_type = block.content_type
+                if content_type in (":post", ":context_patch"):
+                    parsed_blocks.append((block, {}))
+                if content_type != ":post" and block.file_id is not None:
                     self.busy_ids.add(block.file_id)
                     file_blocks += 1
 
-            logging.debug(f"Pack started: input {len(blocks)} included {file_blocks} files blocks")
-            # first sandwich part is chat messages
-            for block in blocks:
-                if block.content_type in (":post", ":context_patch"):
-                    parsed_blocks.append((block, {}))
+            logging.debug("Pack started: input %s included %s files blocks", len(blocks), file_blocks)
 
             for block in blocks:
                 if block.content_type in (":post", ":context_patch"):
@@ -211,40 +358,46 @@ class SandwichPack:
                     file_id = block.file_id if block.file_id is not None else self.generate_unique_file_id()
                     file_map[block.file_name] = file_id
                     block.file_id = file_id
-                    file_list.append(
-                        f"{file_id},{block.file_name},{compute_md5(block.to_sandwich_block())}," +
-                        f"{block.tokens},{block.timestamp}"
-                    )
+                    block_str = block.to_sandwich_block()
+                    block_bytes = block_str.encode("utf-8")  # encoded once: hashed below, its size reused on emission
+                    block_texts[id(block)] = (block_str, len(block_bytes))
+                    file_chunks.append(block_bytes)
+                    file_rows.append([file_id, block.file_name, None, block.tokens, block.timestamp])  # digest filled below
                     if self._is_code_block(block):
                         code_base_file_ids.add(int(file_id))
-                block.strip_strings()
-                block.strip_comments()
-                parsed = block.parse_content()
+                pending.append(block)
+
+            hash_name = file_hash_name()
+            for row, digest in zip(file_rows, compute_file_digests(file_chunks, hash_name)):
+                row[2] = digest
+            file_chunks.clear()
+
+            for block, parsed in self.parse_blocks(pending):
                 parsed_blocks.append((block, parsed))
-                if block.file_name and parsed["entities"]:
+                file_name = block.file_name
+                if file_name and parsed["entities"]:
+                    file_id = block.file_id or file_map.get(file_name)  # same for all entities of the block
                     for ent in parsed["entities"]:
                         name = ent['name']
-                        file_id = block.file_id or file_map.get(block.file_name)
                         if "first_line" not in ent or "last_line" not in ent:
                             logging.warning(
-                                f"Entity {name} in file {block.file_name} missing first_line or last_line"
+                                f"Entity {name} in file {file_name} missing first_line or last_line"
                             )
                             continue
-                        key = (block.file_name, ent["type"], name)
+                        e_type = ent["type"]
+                        key = (file_name, e_type, name)
                         if key not in entity_stor:
-                            entity_stor[key] = len(entities_list)  # global index of entity
+                            entity_stor[key] = len(entity_rows)  # global index of entity
                             vis_short = "pub" if ent["visibility"] == "public" else "prv"
-                            e_type = ent["type"]
-                            name_to_locations.setdefault(name, []).append((block.file_name, e_type))
                             start_line = ent["first_line"]
                             end_line = ent["last_line"]
                             parent = ent.get("parent", "")
                             ent['file_id'] = file_id  # for outside using
                             self.entities.append(ent)
-                            entities_list.append(
-                                f"{vis_short},{e_type},{parent},{name},{file_id},{start_line}-{end_line},{ent['tokens']}"
+                            entity_rows.append(
+                                (vis_short, e_type, parent, name, file_id, f"{start_line}-{end_line}", ent['tokens'])
                             )
-                            self.entity_rev_map[(file_id, ent["type"], name)] = len(entities_list) - 1
+                            self.entity_rev_map[(file_id, e_type, name)] = len(entity_rows) - 1
 
                 for module in parsed["dependencies"]["modules"]:
                     if module not in module_map:
@@ -253,6 +406,8 @@ class SandwichPack:
 
             #  список файлов и блоков упорядочивается по зависимостям, порядок file_id предполагаемо станет хаотичным
             # sorted_files, blocks = organize_modules(file_list, [b[0] for b in parsed_blocks])
+            file_list = [",".join(map(str, row)) for row in file_rows]
+            entities_list = [",".join(map(str, row)) for row in entity_rows]
 
             current_size = 0
             current_tokens = 0
@@ -262,9 +417,9 @@ class SandwichPack:
             sandwiches = []
             global_index = {
                 "packer_version": "0.7",
-                "context_date": datetime.datetime.utcnow().strftime("%Y-%m-%d"),
+                "context_date": time.strftime("%Y-%m-%d", time.gmtime()),
                 "templates": {
-                    "filelist": "file_id,file_name,md5,tokens,timestamp",
+                    "filelist": f"file_id,file_name,{hash_name},tokens,timestamp",
                     "users": "user_id,username,role",
                     "entities": "vis(pub/prv),type,parent,name,file_id,start_line-end_line,tokens"
                 },
@@ -275,7 +430,7 @@ class SandwichPack:
                 "users": users or [],
                 "code_base_files": sorted(code_base_file_ids),
             }
-            warn = self._index_redundancy_warning(file_list, entities_list)
+            warn = self._index_redundancy_warning(file_rows, entity_rows)
             if warn is not None:
                 global_index["warnings"] = [warn]
 
@@ -292,24 +447,39 @@ class SandwichPack:
                 "sandwiches": []
             }
 
+            def store_sandwich(sw_index, content):
+                if sandwich_writer is None:
+                    sandwiches.append("".join(content))
+                else:
+                    with sandwich_writer(sw_index) as f:
+                        f.writelines(content)
+
             current_line = 1
             processed = 0
             total_blocks = len(parsed_blocks)
             for block, parsed in parsed_blocks:
-                logging.debug(f" ================= PROCESSING BLOCK type {block.content_type}, file_id {block.file_id} ==================== ")
+                content_type = block.content_type
+                file_id = block.file_id
+                logging.debug(" ================= PROCESSING BLOCK type %s, file_id %s ==================== ", content_type, file_id)
+                block_str, block_size = block_texts.pop(id(block), (None, 0))
                 if self.compression:
                     block.compress(self.entity_rev_map, file_map)
-                block_str = block.to_sandwich_block()
-                block_size = len(block_str.encode("utf-8"))
+                    block_str = None  # content_text rewritten
+                if block_str is None:
+                    block_str = block.to_sandwich_block()
+                    block_size = utf8_len(block_str)
                 block_tokens = block.tokens
-                block_lines = block_str.count("\n") + 1
+                if self.compression:  # compress() rewrites content_text after construction
+                    block_lines = block_str.count("\n") + 1
+                else:
+                    block_lines = block.line_count + block.wrapper_lines
                 processed += 1
                 target_size = current_size + block_size
                 target_tks = current_tokens + block_tokens
 
                 if target_size > self.max_size or target_tks > self.token_limit:
-                    logging.debug(f"Sandwich #{current_sw_index} reached maximum size, target_size = {target_size}, target_tks = {target_tks} storing and creating new")
-                    sandwiches.append("".join(current_content))
+                    logging.debug("Sandwich #%s reached maximum size, target_size = %s, target_tks = %s storing and creating new", current_sw_index, target_size, target_tks)
+                    store_sandwich(current_sw_index, current_content)
                     deep_index["sandwiches"].append({
                         "file": f"sandwich_{current_sw_index}.txt",
                         "blocks": current_index
@@ -324,12 +494,12 @@ class SandwichPack:
                 block_data = {
                     # "start_line": current_line
                 }
-                if block.content_type == ":post":
+                if content_type == ":post":
                     block_data["post_" + str(block.post_id)] = current_line
-                elif block.content_type == ":context_patch":
+                elif content_type == ":context_patch":
                     block_data["context_patch"] = current_line
-                elif block.file_id is not None:
-                    block_data["file_" + str(block.file_id)] = current_line
+                elif file_id is not None:
+                    block_data["file_" + str(file_id)] = current_line
                 if parsed.get('modules'):
                     block_data["modules"] = [module_map[module] for module in parsed["modules"]]  # module ids
                 if parsed.get('imports'):
@@ -341,30 +511,33 @@ class SandwichPack:
                             imp_map[ent_name] = mod_idx
 
                     block_data["imports"] = imp_map
-                if block.file_name and parsed["entities"]:
-                    ent_uids = [entity_stor[(block.file_name, e["type"], e["name"])] for e in parsed["entities"]]
-                    block_data["entities"] = sorted(ent_uids)
-                current_content.append(block_str + "\n")
+                file_name = block.file_name
+                if file_name and parsed["entities"]:
+                    ent_uids = [entity_stor[(file_name, e["type"], e["name"])] for e in parsed["entities"]]
+                    ent_uids.sort()  # in place; ids are mostly ascending already, which timsort takes in one run
+                    block_data["entities"] = ent_uids
+                current_content += (block_str, "\n")  # no concatenated copy of the block; join/writelines take both
                 current_index.append(block_data)
                 current_size += block_size
                 current_tokens += block_tokens
                 current_line += block_lines
 
             if current_content:
-                sandwiches.append("".join(current_content))
+                store_sandwich(current_sw_index, current_content)
                 deep_index["sandwiches"].append({
                     "file": f"sandwich_{current_sw_index}.txt",
                     "blocks": current_index
                 })
 
-            logging.debug(f" Processed {processed} / {total_blocks} blocks, packing complete")
+            logging.debug(" Processed %s / %s blocks, packing complete", processed, total_blocks)
 
             return {
-                "index": json.dumps(global_index, indent=2),
-                "deep_index": json.dumps(deep_index, indent=2),
+                "index": dump_index(global_index),
+                "deep_index": dump_index(deep_index),
                 "sandwiches": sandwiches
             }
         except Exception as e:
             logging.error(f"#ERROR: Failed to pack blocks: {str(e)}")
+            import traceback
             traceback.print_exc()
             raise
\ No newline at end of file
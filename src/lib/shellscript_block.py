@@ -12,26 +12,27 @@ from lib.entity_parser import EntityParser
 from lib.deps_builder import DepsParser
 from lib.iter_regex import IterativeRegex
 
+# built once per module and shared by all parser instances, matching state lives in the match objects
+_FUNCTION_REGEX = IterativeRegex()\
+    .add_token(r"^(?P<indent>\s*)(?:function\s+)?(?P<name>\w+)\s*\(\)", ["indent", "name"], 2)\
+    .add_token(r"\s*{", ["head_end"], 1)
+_EXPORT_REGEX = IterativeRegex()\
+    .add_token(r"^\s*export\s+-f\s+(?P<name>\w+)", ["name"], 1)
+_SOURCE_REGEX = IterativeRegex()\
+    .add_token(r"^\s*(?:\.|source|\./)\s+(?P<script>[^\s]+)", ["script"], 1)
+
 
 class FunctionParser(EntityParser):
     """Parser for Shell script functions."""
     def __init__(self, entity_type, owner):
-        outer_regex = IterativeRegex()
-        outer_regex.add_token(
-            r"^(?P<indent>\s*)(?:function\s+)?(?P<name>\w+)\s*\(\)", ["indent", "name"], 2
-        ).add_token(
-            r"\s*{", ["head_end"], 1
-        )
-        super().__init__(entity_type, owner, outer_regex, r"\bfunction\b", default_visibility="private")
+        super().__init__(entity_type, owner, _FUNCTION_REGEX, r"\bfunction\b", default_visibility="private")
 
     def parse(self):
         content = self.owner.get_clean_content()
         matches = list(self.outer_regex.all_matches(content))
         exported_functions = set()
-        export_regex = IterativeRegex()
-        export_regex.add_token(r"^\s*export\s+-f\s+(?P<name>\w+)", ["name"], 1)
-        for match in export_regex.all_matches(self.owner.content_text):
-            validation = export_regex.validate_match(self.owner.content_text, match.start())
+        for match in _EXPORT_REGEX.all_matches(self.owner.content_text):
+            validation = _EXPORT_REGEX.validate_match(self.owner.content_text, match.start())
             if validation['hit_rate'] >= 0.5 and validation['match']:
                 exported_functions.add(validation['match'].group('name'))
 
@@ -40,7 +41,7 @@ class FunctionParser(EntityParser):
             vis = "public" if fn_name in exported_functions else self.default_visibility
             start_pos = match.start('name')
             start_line = self.owner.find_line(start_pos)
-            full_text = self.owner.extract_entity_text(start_pos, match.end())
+            full_text = self.owner.extract_entity_text(start_pos, match.end(), lazy=True)
             self.make_add_entity(self.entity_type, fn_name, vis, start_line, full_text)
         return True
 
@@ -48,14 +49,15 @@ class FunctionParser(EntityParser):
 class DepsParserShell(DepsParser):
     """Parser for Shell script dependencies."""
     def __init__(self, owner):
-        outer_regex = IterativeRegex()
-        outer_regex.add_token(r"^\s*(?:\.|source|\./)\s+(?P<script>[^\s]+)", ["script"], 1)
-        super().__init__(owner, outer_regex)
+        super().__init__(owner, _SOURCE_REGEX)
+        self.script_dir = None  # directory of owner file, resolved on the first source statement
 
     def _process_match(self, match):
         script = match.group('script')
         if script:
-            script_path = f"{Path(self.owner.file_name).parent}/{script}".replace("\\", "/")
+            if self.script_dir is None:
+                self.script_dir = str(Path(self.owner.file_name).parent).replace("\\", "/")
+            script_path = self.script_dir + "/" + script.replace("\\", "/")
             if not script_path.startswith("/"):
                 script_path = f"/{script_path}"
             self.add_module(script_path)
@@ -64,17 +66,18 @@ class DepsParserShell(DepsParser):
 class ContentShellScript(ContentBlock):
     """Parser for Shell script content blocks."""
     supported_types = ['.sh', '.bashrc', '.profile']
+    strips_in_parse = True
 
     def __init__(self, content_text: str, content_type: str, file_name: str, timestamp: str, **kwargs):
         super().__init__(content_text, content_type, file_name, timestamp, **kwargs)
         self.tag = "shell"
         self.entity_map = {}
         self.open_sl_comment = ["#"]
-        logging.debug(f"Initialized ContentShellScript with tag={self.tag}, file_name={file_name}")
+        logging.debug("Initialized ContentShellScript with tag=%s, file_name=%s", self.tag, file_name)
 
     def parse_content(self, clean_lines=None, depth=0):
         """Parses shell script content to extract entities and dependencies."""
-        logging.debug(f"Parsing content at depth {depth} for file {self.file_name}")
+        logging.debug("Parsing content at depth %s for file %s", depth, self.file_name)
         if depth >= 2:
             self.parse_warn(f"Maximum recursion depth reached for file {self.file_name}")
             return {"entities": [], "dependencies": {"modules": [], "imports": {}}}
@@ -92,7 +95,7 @@ class ContentShellScript(ContentBlock):
                 if parser.parse():
                     self.extend_deps(parser)
                     self.clean_lines = parser.masquerade()
-                    logging.debug(f"Applied {parser.__class__.__name__} parser, new clean_lines[1:10]: {self.clean_lines[1:10]}")
+                    logging.debug("Applied %s parser, new clean_lines[1:10]: %s", parser.__class__.__name__, self.clean_lines[1:10])
             except Exception as e:
                 logging.error(f"Error in {parser.__class__.__name__} parser for {self.file_name}: {str(e)}")
                 traceback.print_exc()
@@ -100,7 +103,7 @@ class ContentShellScript(ContentBlock):
 
         self.clean_lines = original_clean_lines
         entities = self.sorted_entities()
-        logging.debug(f"Parsed {len(entities)} entities in {self.file_name}")
+        logging.debug("Parsed %s entities in %s", len(entities), self.file_name)
         return {"entities": entities, "dependencies": self.dependencies}
 
 
@@ -13,13 +13,13 @@ from lib.iter_regex import IterativeRegex
 from lib.js_block import MethodParser, FunctionParser, DepsParserJs
 
 METHODS_REGEX_PATTERN = r"^(?P<indent>[ \t]*)(?:methods|computed|watch)\s*:"
+_COMPONENT_REGEX = IterativeRegex()\
+    .add_token(r"^(?P<indent>[ \t]*)(?:const\s+(?P<name>\w+)\s*=\s*)?defineComponent\s*\(\s*{", ["indent", "name"], 2)
 
 class ComponentParser(EntityParser):
     """Parser for Vue components."""
     def __init__(self, entity_type, owner):
-        outer_regex = IterativeRegex()
-        outer_regex.add_token(r"^(?P<indent>[ \t]*)(?:const\s+(?P<name>\w+)\s*=\s*)?defineComponent\s*\(\s*{", ["indent", "name"], 2)
-        super().__init__(entity_type, owner, outer_regex, r"\bdefineComponent\b", default_visibility="public")
+        super().__init__(entity_type, owner, _COMPONENT_REGEX, r"\bdefineComponent\b", default_visibility="public")
 
     def parse(self):
         content = self.owner.get_clean_content()
@@ -31,8 +31,8 @@ class ComponentParser(EntityParser):
             start_pos = match.start('name') if match.group('name') else match.start()
             start_line = self.owner.find_line(start_pos)
             vis = self.default_visibility
-            full_text = self.owner.extract_entity_text(start_pos, match.end())
-            logging.debug(f"Attempting to add component {name} at line {start_line}, text: {full_text!r}")
+            full_text = self.owner.extract_entity_text(start_pos, match.end(), lazy=True)  # only used for token count
+            logging.debug("Attempting to add component %s at line %s, text:\n%s", name, start_line, full_text)
             extra_fields = {"parent": ""}
             self.make_add_entity(self.entity_type, self.owner.module_prefix + name, vis, start_line, full_text, extra_fields)
 
@@ -42,6 +42,7 @@ class ComponentParser(EntityParser):
 class ContentCodeVue(ContentBlock):
     """Parser for Vue content blocks."""
     supported_types = [".vue"]
+    strips_in_parse = True
 
     def __init__(self, content_text: str, content_type: str, file_name: str, timestamp: str, **kwargs):
         super().__init__(content_text, content_type, file_name, timestamp, **kwargs)
@@ -51,11 +52,11 @@ class ContentCodeVue(ContentBlock):
         self.close_ml_string = ["`"]
         self.entity_map = {}
         self.module_prefix = kwargs.get("module_prefix", "")
-        logging.debug(f"Initialized ContentCodeVue with tag={self.tag}, file_name={file_name}, module_prefix={self.module_prefix}")
+        logging.debug("Initialized ContentCodeVue with tag=%s, file_name=%s, module_prefix=%s", self.tag, file_name, self.module_prefix)
 
     def parse_content(self, clean_lines=None, depth=0):
         """Parses Vue content to extract entities and dependencies."""
-        logging.debug(f"Parsing content at depth {depth} for file {self.file_name}")
+        logging.debug("Parsing content at depth %s for file %s", depth, self.file_name)
         if depth >= 2:
             self.parse_warn(f"Maximum recursion depth reached for file {self.file_name}")
             return {"entities": [], "dependencies": {"modules": [], "imports": {}}}
@@ -79,7 +80,7 @@ class ContentCodeVue(ContentBlock):
                 if parser.parse():
                     self.extend_deps(parser)
                     self.clean_lines = parser.masquerade()
-                    logging.debug(f"Applied {parser.__class__.__name__} parser, new clean_lines[1:10]: {self.clean_lines[1:10]}")
+                    logging.debug("Applied %s parser, new clean_lines[1:10]: %s", parser.__class__.__name__, self.clean_lines[1:10])
             except Exception as e:
                 logging.error(f"Error in {parser.__class__.__name__} parser for {self.file_name}: {str(e)}")
                 traceback.print_exc()
@@ -87,7 +88,7 @@ class ContentCodeVue(ContentBlock):
 
         self.clean_lines = original_clean_lines
         entities = self.sorted_entities()
-        logging.debug(f"Parsed {len(entities)} entities in {self.file_name}")
+        logging.debug("Parsed %s entities in %s", len(entities), self.file_name)
         return {"entities": entities, "dependencies": self.dependencies}
 
 
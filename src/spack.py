@@ -23,14 +23,16 @@ def collect_files(root_dir):
     if not os.path.exists(root_dir):
         logging.error(f"Directory {root_dir} does not exist")
         return content
+    supported_type = SandwichPack.supported_type
     for file_path in Path(root_dir).rglob("*"):
+        content_type = file_path.suffix.lower()
+        if not content_type or not supported_type(content_type):
+            # string test before the stat() of is_file(); most entries of a tree are skipped here
+            if content_type:
+                logging.debug("Skipping unsupported content_type: %s for %s", content_type, file_path)
+            continue
         if file_path.is_file() and not is_hidden_file(file_path):
             relative_path = f"/{file_path.relative_to(root_path)}".replace("\\", "/")
-            extension = Path(file_path).suffix.lower()
-            content_type = extension if extension else ""
-            if not content_type or not SandwichPack.supported_type(content_type):
-                logging.debug(f"Skipping unsupported content_type: {content_type} for {relative_path}")
-                continue
             try:
                 with open(file_path, "r", encoding="utf-8-sig", errors="replace") as f:
                     text = f.read()
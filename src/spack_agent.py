@@ -55,17 +55,17 @@ def run_pack(project_root: Path, project_name: str) -> str:
     SandwichPack.load_block_classes()
     blocks = []
 
+    supported_type = SandwichPack.supported_type
     for file_path in project_root.rglob("*"):
+        ext = file_path.suffix.lower()
+        if not ext or not supported_type(ext):
+            continue  # string test first, is_file() below costs a stat() per entry
         if not file_path.is_file():
             continue
         rel_parts = file_path.relative_to(project_root).parts
         if any(p.startswith(".") or p in SKIP_DIRS for p in rel_parts):
             continue
 
-        ext = file_path.suffix.lower()
-        if not ext or not SandwichPack.supported_type(ext):
-            continue
-
         relative_path = "/" + str(file_path.relative_to(project_root.parent)).replace("\\", "/")
         try:
             text = file_path.read_text(encoding="utf-8-sig", errors="replace")
@@ -85,14 +85,22 @@ def run_pack(project_root: Path, project_name: str) -> str:
         log.error("No files collected, aborting")
         sys.exit(1)
 
+    output_dir.mkdir(exist_ok=True)
+    written = []
+
+    def sandwich_writer(i):
+        # sandwiches go to disk as they are completed; index copy is appended once the index is built
+        written.append(output_dir / f"sandwich_{i}.txt")
+        return written[-1].open("w", encoding="utf-8")
+
     packer = SandwichPack(project_name)
-    result = packer.pack(blocks)
+    result = packer.pack(blocks, sandwich_writer=sandwich_writer)
 
-    output_dir.mkdir(exist_ok=True)
-    for i, sandwich in enumerate(result["sandwiches"], 1):
-        out = output_dir / f"sandwich_{i}.txt"
-        out.write_text(sandwich + "\nINDEX_COPY:\n" + result["index"], encoding="utf-8")
-        log.info(f"  sandwich_{i}.txt  ({len(sandwich.encode())} bytes)")
+    for out in written:
+        size = out.stat().st_size
+        with out.open("a", encoding="utf-8") as f:
+            f.write("\nINDEX_COPY:\n" + result["index"])
+        log.info(f"  {out.name}  ({size} bytes)")
 
     index_file.write_text(result["index"] + "STRUCTURE: " + result["deep_index"], encoding="utf-8")
     (output_dir / "sandwiches_structure.json").write_text(result["deep_index"], encoding="utf-8")
@@ -3,7 +3,10 @@
 
 import unittest
 import os
+import sys
 import logging
+from unittest import mock
+from lib import llm_tools
 from lib.content_block import ContentBlock, estimate_tokens
 from lib.rust_block import ContentCodeRust
 from lib.vue_block import ContentCodeVue
@@ -189,6 +192,35 @@ class TestClass {
         self.entity_check(ent_list[1], "class", "TestClass")
         self.entity_check(ent_list[2], "method", "testMethod")
 
+    def test_lines_tokens_estimate(self):
+        """Prefix-sum token estimate matches estimate_tokens for joined line ranges."""
+        content = "fn a() {\n    let x = long_identifier;\n\n  }  \n\tb\n"
+        block = ContentBlock(content, ":document")
+        block.clean_lines = [""] + content.splitlines()
+        for first in range(1, len(block.clean_lines)):
+            for last in range(first, len(block.clean_lines)):
+                text = "\n".join(block.clean_lines[first:last + 1])
+                self.assertEqual(block.estimate_lines_tokens(first, last, text), estimate_tokens(text))
+        self.assertEqual(block.estimate_lines_tokens(1, 2, "a() {"), estimate_tokens("a() {"))
+
+    def test_tiktoken_encoding_fallback(self):
+        """Unavailable cl100k_base encoding (e.g. offline BPE download) falls back to the heuristic."""
+        content = "fn main() {\n    println!(\"hi\");\n}\n"
+        expected = estimate_tokens(content)
+        stub = mock.Mock()
+        stub.get_encoding.side_effect = ValueError("no BPE file")
+        llm_tools._tiktoken_encoding = False
+        try:
+            with mock.patch.dict(os.environ, {"SPACK_TOKENIZER": "tiktoken"}), \
+                    mock.patch.dict(sys.modules, {"tiktoken": stub}), \
+                    self.assertLogs(level="WARNING") as log:
+                self.assertEqual(estimate_tokens(content), expected)
+                self.assertEqual(llm_tools.tokenizer_name(), "estimate")
+        finally:
+            llm_tools._tiktoken_encoding = False
+        stub.get_encoding.assert_called_once_with("cl100k_base")
+        self.assertTrue(any("no BPE file" in msg for msg in log.output))
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
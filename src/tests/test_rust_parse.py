@@ -5,6 +5,8 @@ import unittest
 import os
 import json
 import logging
+import tempfile
+from unittest import mock
 from lib.content_block import ContentBlock, estimate_tokens
 from lib.rust_block import ContentCodeRust
 
@@ -107,5 +109,21 @@ class TestRustParse(unittest.TestCase):
         self.assertEqual(clean_lines[4].strip(), 'let t = r#""#;')  # r#...#
         # print("Raw string strip log:\n\t", "\n\t".join(_b.strip_log))
 
+    def test_parse_cache_roundtrip(self):
+        test_content = ("// origin point\npub struct Point {\n    x: i32,\n}\n\n"
+                        "fn origin() -> Point {\n    let _s = \"zero\";\n    Point { x: 0 }\n}\n")
+        with tempfile.TemporaryDirectory() as cache_dir, \
+                mock.patch.dict(os.environ, {'SPACK_PARSE_CACHE_DIR': cache_dir}):
+            _fresh = ContentCodeRust(test_content, ".rs", "cache.rs", "2025-07-29T18:00:00Z")
+            fresh = _fresh.parse_content()
+            self.assertEqual(len(os.listdir(cache_dir)), 1)
+            _b = ContentCodeRust(test_content, ".rs", "cache.rs", "2025-07-29T18:00:00Z")
+            cached = _b.parse_content()
+        self.assertEqual(cached, fresh)
+        self.assertEqual(sorted(_b.entity_map.keys()), [e["first_line"] for e in fresh["entities"]])
+        self.assertTrue(_fresh.strip_log)
+        self.assertEqual(_b.strip_log, _fresh.strip_log)
+        self.assertEqual(_b.warnings, _fresh.warnings)
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,122 @@
+# /tests/test_sandwich_pack.py, updated 2026-10-16
+# Formatted with proper line breaks and indentation for project compliance.
+
+import unittest
+import os
+import io
+import json
+import logging
+import contextlib
+from pathlib import Path
+from unittest import mock
+from lib import sandwich_pack
+from lib.content_block import ContentBlock, ContextPatchBlock, SpanBlock
+from lib.sandwich_pack import SandwichPack, dump_index
+
+logging.basicConfig(
+    level=os.environ.get('LOGLEVEL', 'INFO').upper()
+)
+
+TESTS_DIR = Path(__file__).parent
+LIB_DIR = TESTS_DIR.parent / "lib"
+
+
+def make_blocks():
+    """Fresh blocks over the parser fixtures and the *_block.py sources, well above PARSE_POOL_MIN_CHARS."""
+    SandwichPack.load_block_classes()
+    files = sorted(TESTS_DIR.glob("test.*")) + sorted(LIB_DIR.glob("*_block.py"))
+    blocks = []
+    for path in files:
+        if path.suffix in (".cln", ".json"):
+            continue
+        content = path.read_text(encoding="utf-8")
+        blocks.append(SandwichPack.create_block(content, path.suffix, f"/src/{path.parent.name}/{path.name}",
+                                                "2025-08-01T11:00:00Z"))
+    return blocks
+
+
+def pack_blocks(**kwargs):
+    return SandwichPack("test", max_size=20_000).pack(make_blocks(), **kwargs)
+
+
+class TestSandwichPack(unittest.TestCase):
+    def assertSameIndex(self, result, expected):
+        index, expected_index = json.loads(result["index"]), json.loads(expected["index"])
+        index.pop("context_date")
+        expected_index.pop("context_date")
+        self.assertEqual(index, expected_index)
+        self.assertEqual(result["deep_index"], expected["deep_index"])
+
+    def test_inputs_above_pool_floor(self):
+        blocks = make_blocks()
+        self.assertGreater(sum(len(b.content_text) for b in blocks), sandwich_pack.PARSE_POOL_MIN_CHARS)
+
+    def test_parse_pool_matches_serial(self):
+        with mock.patch.dict(os.environ, {"SPACK_PARSE_WORKERS": ""}):
+            serial = pack_blocks()
+        with mock.patch.dict(os.environ, {"SPACK_PARSE_WORKERS": "4"}):
+            pooled = pack_blocks()
+        self.assertGreater(len(serial["sandwiches"]), 1)
+        self.assertSameIndex(pooled, serial)
+        self.assertEqual(pooled["sandwiches"], serial["sandwiches"])
+
+    def test_parse_state_returns_parse_outputs(self):
+        block = make_blocks()[0]
+        state, parsed = sandwich_pack._parse_block_state(type(block).__name__, dict(block.__dict__))
+        self.assertEqual(set(state), set(sandwich_pack.PARSE_STATE_FIELDS))
+        self.assertEqual(sorted(state["entity_map"]), [e["first_line"] for e in parsed["entities"]])
+
+    def test_sandwich_writer(self):
+        written = {}
+
+        @contextlib.contextmanager
+        def writer(sw_index):
+            buf = io.StringIO()
+            yield buf
+            written[sw_index] = buf.getvalue()
+
+        expected = pack_blocks()
+        result = pack_blocks(sandwich_writer=writer)
+        self.assertGreater(len(written), 1)
+        self.assertEqual(result["sandwiches"], [])
+        self.assertSameIndex(result, expected)
+        self.assertEqual([written[n] for n in sorted(written)], expected["sandwiches"])
+        files = [sw["file"] for sw in json.loads(result["deep_index"])["sandwiches"]]
+        self.assertEqual([f"sandwich_{n}.txt" for n in sorted(written)], files)
+
+    def test_wrapper_lines(self):
+        """pack() counts block lines as line_count + wrapper_lines instead of scanning the sandwich text."""
+        for content in ("first line\n    second {\n\n}", "single", "trailing newline\n"):
+            blocks = [ContentBlock(content, ":post", post_id=1, timestamp="2025-08-01T11:00:00Z"),
+                      ContextPatchBlock(content, patch_kind="file", file_id=2, timestamp="2025-08-01T11:00:00Z"),
+                      SpanBlock(content, 3, "abc", {"start": 1, "end": 4}),
+                      SpanBlock(content, 3, "abc", {})]
+            for block_class in SandwichPack.load_block_classes():
+                if block_class is ContextPatchBlock:
+                    continue  # keyword-only constructor, built above
+                for content_type in block_class.supported_types:
+                    if SandwichPack._type_to_class.get(content_type) is block_class:
+                        blocks.append(SandwichPack.create_block(content, content_type, f"/src/file{content_type}",
+                                                                "2025-08-01T11:00:00Z"))
+            for block in blocks:
+                with self.subTest(block=type(block).__name__, content_type=block.content_type, content=content):
+                    self.assertEqual(block.line_count + block.wrapper_lines,
+                                     block.to_sandwich_block().count("\n") + 1)
+            self.assertEqual(blocks[3].to_sandwich_block(), "<error msg='Wrong span metadata'>{}</error>")
+
+    @unittest.skipIf(sandwich_pack.orjson is None, "orjson is not installed")
+    def test_dump_index_matches_json(self):
+        data = {
+            "project_name": "Проект 🚀",
+            "files": ["0,/src/привет.rs,abc,12,2025-08-01", "1,/src/emoji_😀.py,def,3,2025-08-01"],
+            "controls": "tab\t nl\n cr\r nul\x00 esc\x1b del\x7f nbsp\xa0 bom\ufeff",
+            7: {"0": [1, -2, 2 ** 40], 3: None, "nested": {"ok": True, "no": False, "empty": []}},
+            "empty": {},
+        }
+        self.assertEqual(dump_index(data), json.dumps(data, indent=2))
+        data["huge"] = 2 ** 70  # beyond orjson int range, json.dumps fallback
+        self.assertEqual(dump_index(data), json.dumps(data, indent=2))
+
+
+if __name__ == "__main__":
+    unittest.main()